@@ -19,6 +19,13 @@ except ImportError as e:
     st.error("Make sure your chatbot system is properly structured")
     st.stop()
 
+# One answer cache for the whole server: every Streamlit session builds its own
+# chatbot, but standalone FAQ answers are the same for all of them
+@st.cache_resource
+def shared_answer_cache():
+    from chatbot.knowledge_base.cache import AnswerCache
+    return AnswerCache(max_size=512, ttl=3600)
+
 # Define the path to the .env file
 ENV_FILE_PATH = "./.env"
 
@@ -206,7 +213,8 @@ if 'chatbot' not in st.session_state:
             st.session_state.chatbot = COBCustomerCareSystem(
                 clinic_db_path="clinic_appointments_2.db",
                 cob_db_path="cob_system_2.db",
-                knowledge_base_path="knowledge_base/"
+                knowledge_base_path="knowledge_base/",
+                answer_cache=shared_answer_cache()
             )
         except ImportError as e:
             st.error(f"Failed to import chatbot: {str(e)}")
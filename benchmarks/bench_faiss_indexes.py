@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from chatbot.knowledge_base.index_factory import IndexConfig, build_index, set_search_params
+
+
+def make_corpus(num_vectors: int, dimension: int, num_queries: int, seed: int):
+    """Clustered synthetic embeddings, closer to real text embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, num_vectors // 100), dimension)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), size=num_vectors + num_queries)
+    points = centers[assignments] + 0.3 * rng.normal(size=(num_vectors + num_queries, dimension)).astype(np.float32)
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return points[:num_vectors], points[num_vectors:]
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run_benchmark(num_vectors: int, dimension: int, num_queries: int, k: int, seed: int):
+    corpus, queries = make_corpus(num_vectors, dimension, num_queries, seed)
+
+    configs = [("flat", IndexConfig(index_type="flat"), {})]
+    for nprobe in (1, 8, 32):
+        configs.append((f"ivf_flat nprobe={nprobe}", IndexConfig(index_type="ivf_flat"), {"nprobe": nprobe}))
+        configs.append((f"ivf_pq nprobe={nprobe}", IndexConfig(index_type="ivf_pq"), {"nprobe": nprobe}))
+    for ef in (16, 64, 256):
+        configs.append((f"hnsw efSearch={ef}", IndexConfig(index_type="hnsw"), {"ef_search": ef}))
+
+    truth = None
+    built = {}
+    print(f"{'index':<24}{'build s':>10}{'query ms':>10}{'recall@' + str(k):>11}")
+    for name, config, params in configs:
+        build_seconds = 0.0
+        if config.index_type not in built:
+            start = time.perf_counter()
+            built[config.index_type] = build_index(corpus, config)
+            build_seconds = time.perf_counter() - start
+        index = built[config.index_type]
+        set_search_params(index, **params)
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        query_ms = (time.perf_counter() - start) * 1000 / num_queries
+
+        if truth is None:
+            truth = found
+        print(f"{name:<24}{build_seconds:>10.2f}{query_ms:>10.3f}{recall_at_k(found, truth):>11.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Recall vs latency of FAISS index types against the flat baseline")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_benchmark(args.vectors, args.dim, args.queries, args.k, args.seed)
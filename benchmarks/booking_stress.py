@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+from uuid import uuid4
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from chatbot.database.manager import DatabaseManager
+
+
+def seed_slots(db_path: str, num_doctors: int, slots_per_doctor: int):
+    """Open appointment slots on consecutive half hours"""
+    rows = []
+    for d in range(num_doctors):
+        for s in range(slots_per_doctor):
+            hour, half = divmod(s, 2)
+            rows.append((
+                "clinic-0", f"doctor-{d}", f"Dr. Stress {d}", "Cardiology", "Stress Clinic",
+                f"2030-01-01 {8 + hour:02d}:{30 * half:02d}:00", "True"
+            ))
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("""
+            INSERT INTO appointments
+            (clinic_id, doctor_id, doctor_name, specialty, clinic_name, slot_datetime, available)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    return [(row[1], row[5]) for row in rows]
+
+
+def run_stress(threads: int, requests_per_thread: int, num_doctors: int, slots_per_doctor: int,
+               duplicate_rate: float, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        clinic_db = os.path.join(tmp, "clinic.db")
+        db_manager = DatabaseManager(clinic_db, os.path.join(tmp, "cob.db"))
+        slots = seed_slots(clinic_db, num_doctors, slots_per_doctor)
+        service = db_manager.booking_service
+        booked_ids = []
+        lock = threading.Lock()
+
+        def worker(worker_id: int):
+            rng = random.Random(seed + worker_id)
+            for _ in range(requests_per_thread):
+                doctor_id, slot_datetime = rng.choice(slots)
+                # Look before booking, as the chat flow does; served by the availability cache
+                db_manager.get_available_clinic_slots(f"{slot_datetime[:10]} 00:00:00", specialty="Cardiology")
+                key = str(uuid4())
+                # Resubmit the same request, as a rerun UI or impatient double-click would
+                submissions = 2 if rng.random() < duplicate_rate else 1
+                for _ in range(submissions):
+                    result = service.book_slot(
+                        "clinic",
+                        {"doctor_id": doctor_id, "slot_datetime": slot_datetime},
+                        {"appointment_id": str(uuid4()), "patient_name": f"Patient {worker_id}"},
+                        idempotency_key=key
+                    )
+                    if result.booked and not result.replayed:
+                        with lock:
+                            booked_ids.append(result.appointment_id)
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with sqlite3.connect(clinic_db) as conn:
+            stored = conn.execute(
+                "SELECT appointment_id FROM appointments WHERE available = 'False'"
+            ).fetchall()
+
+        metrics = service.metrics.snapshot()
+        requests = metrics["booked"] + metrics["conflicts"] + metrics["replays"] + metrics["busy_failures"]
+        double_bookings = len(booked_ids) - len(set(booked_ids) & {row[0] for row in stored})
+
+        print(f"threads={threads} requests={requests} slots={len(slots)} elapsed={elapsed:.2f}s")
+        print(f"throughput: {requests / elapsed:.0f} requests/s")
+        for name, value in metrics.items():
+            print(f"  {name}: {value:.2f}" if isinstance(value, float) else f"  {name}: {value}")
+        print("availability cache:")
+        for name, value in db_manager.availability_cache.metrics.snapshot().items():
+            print(f"  {name}: {value:.2f}" if isinstance(value, float) else f"  {name}: {value}")
+        print(f"booked slots in DB: {len(stored)}, successful bookings reported: {len(booked_ids)}")
+        print(f"double bookings: {double_bookings}")
+        if double_bookings or len(stored) != len(booked_ids):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Booking requests per thread")
+    parser.add_argument("--doctors", type=int, default=10)
+    parser.add_argument("--slots", type=int, default=16, help="Slots per doctor")
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_stress(args.threads, args.requests, args.doctors, args.slots, args.duplicate_rate, args.seed)
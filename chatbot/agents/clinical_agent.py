@@ -3,23 +3,22 @@ from langchain_core.messages import HumanMessage
 from ..database.manager import DatabaseManager
 from ..main_agent import MainOrchestratorAgent
 from ..models.appointments import AppointmentRequest
+from ..models.slots import ClinicSlot, describe_time_range
 from ..tools.clinic_tools import (  # ADD THIS IMPORT
     ClinicAvailabilityTool, 
     AppointmentBookingTool,
+    BulkAppointmentBookingTool,
     ClinicInfoTool,
     DoctorAvailabilityTool
 )
 from ..tools.knowledge_tools import KnowledgeRetrievalTool 
-from ..knowledge_base.manager import KnowledgeBaseManager 
-from typing import Dict
+from typing import Dict, List
 import json
 import re
 from datetime import datetime, timedelta
 from dataclasses import asdict
 
 
-KNOWLEDGE_BASE_PATH = "knowledge_base/"
-
 class ClinicalAgent:
     def __init__(self, llm: ChatGoogleGenerativeAI, db_manager: DatabaseManager, orchestrator: MainOrchestratorAgent):
         self.llm = llm
@@ -31,9 +30,11 @@ class ClinicalAgent:
         self.tools = {
             "availability_checker": ClinicAvailabilityTool(db_manager=db_manager),
             "appointment_booker": AppointmentBookingTool(db_manager=db_manager),
+            "bulk_appointment_booker": BulkAppointmentBookingTool(db_manager=db_manager),
             "clinic_info": ClinicInfoTool(db_manager=db_manager),
             "doctor_availability": DoctorAvailabilityTool(db_manager=db_manager),
-            "knowledge_retriever": KnowledgeRetrievalTool(kb_manager=KnowledgeBaseManager(KNOWLEDGE_BASE_PATH))
+            # Share the orchestrator's KB so retrieval caches are shared too
+            "knowledge_retriever": KnowledgeRetrievalTool(kb_manager=orchestrator.kb_manager)
         }
         
         # Tool selection prompt template
@@ -70,6 +71,9 @@ class ClinicalAgent:
                 return self._complete_booking(request, session_data)
             elif user_input.lower() in ['no', 'n']:
                 session_data.pop('pending_confirmation', None)
+                hold = session_data.pop('slot_hold', None)
+                if hold:
+                    self.db_manager.release_hold(hold['kind'], hold['hold_id'])
                 return "Let's make changes. What would you like to change?"
 
         # Extract all clinical parameters from user input
@@ -88,6 +92,9 @@ class ClinicalAgent:
         # Update request with extracted parameters
         for key, value in extracted_params.items():
             if value is not None:  # Only update if not null
+                if key in ("doctor_name", "specialty") and value != getattr(request, key):
+                    # A doctor chosen earlier may no longer match; pick again at booking
+                    request.clinic_id = request.doctor_id = None
                 setattr(request, key, value)
         
         # Save updated request
@@ -177,42 +184,44 @@ class ClinicalAgent:
     def _check_availability(self, request: AppointmentRequest, session_data: Dict) -> str:
         """Check availability and provide alternatives if needed"""
         # Get availability for requested time/range
-        availability = self.tools["availability_checker"]._run(
-            date=request.date,
-            specialty=request.specialty,
-            doctor_name=request.doctor_name,
-            start_time=request.start_time,
-            end_time=request.end_time
-        )
-        
+        checker = self.tools["availability_checker"]
         try:
-            slots = json.loads(availability)
-            if isinstance(slots, list) and slots:
-                # If specific time was requested, look for exact match
-                if request.time:
-                    for slot in slots:
-                        slot_time = slot['datetime'].split()[1][:8]  # Extract HH:MM:SS
-                        if slot_time == request.time:
-                            # Store for potential booking
-                            request.clinic_id = slot['clinic_id']
-                            request.doctor_id = slot['doctor_id']
-                            session_data['clinical_request'] = asdict(request)
-                            
-                            return (
-                                f"Slot available! Dr. {slot['doctor']} at {slot_time} in {slot['clinic']}.\n"
-                                "Would you like to book this appointment? (yes/no)"
-                            )
-                    
-                    # If exact time not found, get alternative times
-                    return self._get_alternative_times(request)
-                
-                # If no specific time requested - just return all available slots
-                return self._format_availability_response(request, slots)
-        except:
-            pass
-        
-        # If we get here, either no slots or error
-        return availability
+            slots = checker.get_slots(
+                date=request.date,
+                specialty=request.specialty,
+                doctor_name=request.doctor_name,
+                start_time=request.start_time,
+                end_time=request.end_time,
+                session_id=self.orchestrator.current_session
+            )
+        except Exception as e:
+            return f"Error checking availability: {str(e)}"
+
+        if not slots:
+            return (
+                f"No available appointment slots found on {request.date}"
+                f"{describe_time_range(request.start_time, request.end_time)}."
+            )
+
+        # If specific time was requested, look for exact match
+        if request.time:
+            for slot in slots:
+                if slot.time == request.time:
+                    # Store for potential booking
+                    request.clinic_id = slot.clinic_id
+                    request.doctor_id = slot.doctor_id
+                    session_data['clinical_request'] = asdict(request)
+
+                    return (
+                        f"Slot available! Dr. {slot.doctor} at {slot.time} in {slot.clinic}.\n"
+                        "Would you like to book this appointment? (yes/no)"
+                    )
+
+            # If exact time not found, suggest the closest times that day
+            return self._get_alternative_times(request, slots)
+
+        # If no specific time requested - just return all available slots
+        return self._format_availability_response(request, slots)
 
     def _get_alternative_times(self, request: AppointmentRequest) -> str:
         """Find and format alternative time suggestions"""
@@ -250,14 +259,13 @@ class ClinicalAgent:
                 return f"No available appointments found for Dr. {request.doctor_name} on {request.date}."
 
 
-    def _format_availability_response(self, request: AppointmentRequest, all_slots: list) -> str:
+    def _format_availability_response(self, request: AppointmentRequest, all_slots: List[ClinicSlot]) -> str:
         """Format availability response with alternative suggestions"""
         # If time range was requested, just return the slots in range
         if request.start_time or request.end_time:
             response = ["Available slots in your requested range:"]
             for slot in all_slots:
-                slot_time = slot['datetime'].split()[1][:5]  # HH:MM
-                response.append(f"- Dr. {slot['doctor']} at {slot_time} in {slot['clinic']}")
+                response.append(f"- Dr. {slot.doctor} at {slot.time[:5]} in {slot.clinic}")
             return "\n".join(response)
         
         # If specific time was requested but not available, find alternatives
@@ -267,21 +275,20 @@ class ClinicalAgent:
         # No specific time requested - just return all available slots
         response = [f"Available slots on {request.date}:"]
         for slot in all_slots:
-            slot_time = slot['datetime'].split()[1][:5]  # HH:MM
-            response.append(f"- Dr. {slot['doctor']} at {slot_time} in {slot['clinic']}")
+            response.append(f"- Dr. {slot.doctor} at {slot.time[:5]} in {slot.clinic}")
         return "\n".join(response)
 
-    def _get_alternative_times(self, request: AppointmentRequest, all_slots: list) -> str:
+    def _get_alternative_times(self, request: AppointmentRequest, all_slots: List[ClinicSlot]) -> str:
         """Find and format alternative time suggestions"""
         # Convert to datetime objects
-        target_dt = datetime.strptime(f"{request.date} {request.time}", "%Y-%m-%d %H:%M:%S")
+        target_dt = datetime.strptime(f"{request.date.split()[0]} {request.time}", "%Y-%m-%d %H:%M:%S")
         slot_objs = []
         for slot in all_slots:
-            slot_dt = datetime.strptime(slot['datetime'], "%Y-%m-%d %H:%M:%S")
+            slot_dt = datetime.strptime(slot.datetime, "%Y-%m-%d %H:%M:%S")
             slot_objs.append({
                 "datetime": slot_dt,
-                "clinic": slot['clinic'],
-                "doctor": slot['doctor'],
+                "clinic": slot.clinic,
+                "doctor": slot.doctor,
                 "difference": abs((slot_dt - target_dt).total_seconds())
             })
         
@@ -307,27 +314,45 @@ class ClinicalAgent:
         """Handle booking using pre-extracted parameters"""
         # Check if we have enough information to book
         if request.customer_name and request.contact_email and request.date and request.time:
-            # Get clinic/doctor details from availability
-            availability = self.tools["availability_checker"]._run(
-                date=request.date,
+            # Look up the exact slot key instead of scanning the day's availability
+            slot_datetime = f"{request.date.split()[0]} {request.time}"
+            slot = self.db_manager.find_clinic_slot(
+                slot_datetime,
                 specialty=request.specialty,
                 doctor_name=request.doctor_name,
-                start_time=request.start_time,
-                end_time=request.end_time
+                doctor_id=request.doctor_id,
+                session_id=self.orchestrator.current_session
             )
-            
-            try:
-                slots = json.loads(availability)
-                if isinstance(slots, list) and slots:
-                    for slot in slots:
-                        slot_time = slot['datetime'].split()[1][:8]
-                        if slot_time == request.time:
-                            request.clinic_id = slot['clinic_id']
-                            request.doctor_id = slot['doctor_id']
-                            break
-            except:
-                pass
-            
+
+            # Reserve the slot while the user confirms so another session cannot take it
+            previous_hold = session_data.pop('slot_hold', None)
+            hold_id = None
+            if slot:
+                request.clinic_id, request.doctor_id, request.doctor_name = slot
+                hold_id = self.db_manager.place_hold(
+                    "clinic",
+                    request.doctor_id,
+                    slot_datetime,
+                    session_id=self.orchestrator.current_session
+                )
+            # A re-hold of the same slot already replaced it; any other earlier slot is freed
+            if previous_hold:
+                self.db_manager.release_hold(previous_hold['kind'], previous_hold['hold_id'])
+            if not hold_id:
+                session_data.pop('pending_confirmation', None)
+                return (
+                    f"Sorry, {request.time} on {request.date} is no longer available. "
+                    "Please choose another time."
+                )
+            session_data['clinical_request'] = asdict(request)
+            # Slot key travels with the hold so the confirm turn books it directly
+            session_data['slot_hold'] = {
+                "kind": "clinic",
+                "hold_id": hold_id,
+                "resource_id": request.doctor_id,
+                "slot_datetime": slot_datetime
+            }
+
             # Confirm before booking
             session_data['pending_confirmation'] = True
             return (
@@ -356,7 +381,9 @@ class ClinicalAgent:
             doctor_name=request.doctor_name,
             slot_datetime=slot_datetime,
             patient_name=request.customer_name,
-            contact_email=request.contact_email
+            contact_email=request.contact_email,
+            hold_id=session_data.pop('slot_hold', {}).get('hold_id'),
+            doctor_id=request.doctor_id
         )
         
         # If booking succeeded, clear session
@@ -1,27 +1,62 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from ..knowledge_base.manager import KnowledgeBaseManager
+from ..knowledge_base.cache import AnswerCache
 from ..main_agent import MainOrchestratorAgent
 from ..tools.knowledge_tools import KnowledgeRetrievalTool
 from langchain_core.messages import HumanMessage
+from typing import Optional
 import re
 
+# Words that lean on earlier turns ("how much is it?"); questions without them stand alone
+REFERRING_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she",
+    "him", "her", "one", "ones", "also", "same", "above", "previous", "else", "again"
+}
+
+
+def is_standalone(question: str) -> bool:
+    """Whether question can be answered without the conversation before it"""
+    return not REFERRING_WORDS & set(re.findall(r"[a-z]+", question.lower()))
+
 
 class KnowledgeAgent:
     """Agent specialized in handling product and company knowledge queries"""
 
-    def __init__(self, llm: ChatGoogleGenerativeAI, kb_manager: KnowledgeBaseManager, orchestrator: MainOrchestratorAgent):
+    def __init__(self, llm: ChatGoogleGenerativeAI, kb_manager: KnowledgeBaseManager, orchestrator: MainOrchestratorAgent,
+                 answer_cache_size: int = 512, answer_cache_ttl: Optional[float] = 3600,
+                 answer_cache: Optional[AnswerCache] = None):
         self.llm = llm
         self.kb_manager = kb_manager
         self.orchestrator = orchestrator
         self.retrieval_tool = KnowledgeRetrievalTool(kb_manager=kb_manager)
+        # Hot FAQ answers keyed by normalized question + KB version; pass one
+        # instance to every session's agent so they share it
+        self.answer_cache = answer_cache or AnswerCache(max_size=answer_cache_size, ttl=answer_cache_ttl)
 
-    def handle_query(self, query: str) -> str:
+    def _prior_context(self, query: str, session_id: Optional[str]) -> str:
+        """This session's conversation before the current question"""
+        history = self.orchestrator.session_history(session_id)
+        if history and history[-1]['role'] == "user" and history[-1]['content'] == query:
+            history = history[:-1]
+        return "\n".join(f"{msg['role']}: {msg['content']}" for msg in history)
+
+    def handle_query(self, query: str, session_id: Optional[str] = None) -> str:
         """Handle knowledge queries using conversation context"""
-        # Build context from history
-        context_str = self.orchestrator.get_conversation_context()
+        context_str = self._prior_context(query, session_id)
+
+        # The answer cache is shared by all sessions, so only questions that stand
+        # on their own are cached, and they are answered without the conversation
+        cacheable = not context_str or is_standalone(query)
+        kb_version = self.kb_manager.version
+        if cacheable:
+            context_str = ""
+            # Serve repeated questions without retrieval or an LLM call
+            cached = self.answer_cache.get(query, kb_version)
+            if cached is not None:
+                return cached
 
-        # Retrieve relevant documents
-        context = self.retrieval_tool._run(query)
+        # Retrieve relevant documents, narrowed only when the question names exactly one partition
+        context = self.retrieval_tool._run(query, source=self.kb_manager.guess_source(query))
 
         # Generate response with context
         prompt = f"""
@@ -38,4 +73,8 @@ class KnowledgeAgent:
         """
 
         response = self.llm.invoke([HumanMessage(content=prompt)])
+
+        # Only cache answers grounded in retrieved knowledge
+        if cacheable and context.startswith("["):
+            self.answer_cache.set(query, kb_version, response.content)
         return response.content
@@ -3,7 +3,10 @@ from langchain_core.messages import HumanMessage
 from ..database.manager import DatabaseManager
 from ..main_agent import MainOrchestratorAgent
 from ..models.appointments import MarketingMeetingRequest
-from ..tools.marketing_tools import MarketingAvailabilityTool, MarketingMeetingBookingTool
+from ..models.slots import describe_time_range
+from ..tools.marketing_tools import (
+    MarketingAvailabilityTool, MarketingMeetingBookingTool, BulkMarketingMeetingBookingTool
+)
 from typing import Dict, Tuple, Optional
 from dataclasses import asdict
 import re
@@ -16,6 +19,7 @@ class MarketingAgent:
         self.db_manager = db_manager
         self.availability_tool = MarketingAvailabilityTool(db_manager=db_manager)
         self.booking_tool = MarketingMeetingBookingTool(db_manager=db_manager)
+        self.bulk_booking_tool = BulkMarketingMeetingBookingTool(db_manager=db_manager)
         self.orchestrator = orchestrator
         self.max_attempts = 3
 
@@ -41,25 +45,28 @@ class MarketingAgent:
             # Handle availability queries
             if "available" in user_input.lower() and request.date:
                 # Use time range if provided
-                availability = self.availability_tool._run(
-                    date=request.date,
-                    marketer_name=request.marketer_name,
-                    start_time=request.start_time,
-                    end_time=request.end_time
-                )
+                try:
+                    slots = self.availability_tool.get_slots(
+                        date=request.date,
+                        marketer_name=request.marketer_name,
+                        start_time=request.start_time,
+                        end_time=request.end_time,
+                        session_id=self.orchestrator.current_session
+                    )
+                except Exception as e:
+                    return f"Error checking marketing availability: {str(e)}"
 
                 # Store updated request in session
                 session_data['marketing_request'] = asdict(request)
 
                 # Format availability results for better readability
-                try:
-                    slots = json.loads(availability)
-                    if isinstance(slots, list):
-                        slot_list = "\n".join([f"- {slot['marketer']} at {slot['datetime']}" for slot in slots])
-                        return f"Available slots:\n{slot_list}"
-                except:
-                    pass
-                return availability
+                if not slots:
+                    return (
+                        f"No available marketing meeting slots found on {request.date}"
+                        f"{describe_time_range(request.start_time, request.end_time)}."
+                    )
+                slot_list = "\n".join([f"- {slot.marketer} at {slot.datetime}" for slot in slots])
+                return f"Available slots:\n{slot_list}"
 
         # Create prompt with context
         prompt = f"""
@@ -156,25 +163,20 @@ class MarketingAgent:
 
     def confirm_and_book(self, request: MarketingMeetingRequest, session_data: Dict) -> str:
         """Confirm details and complete booking with alternative times"""
-        # Check availability
-        availability = self.availability_tool._run(
-            date=request.date,
-            start_time=request.start_time,
-            end_time=request.end_time
-        )
-
-        if "No available" in availability:
-            return f"No available marketing meetings on {request.date}. Please choose another date."
-
         try:
-            # Parse availability to find matching slot
-            slots = json.loads(availability)
-            matching_slot = None
-            for slot in slots:
-                slot_time = slot['datetime'].split()[1][:8]  # Extract HH:MM:SS
-                if slot_time == request.time:
-                    matching_slot = slot
-                    break
+            # Check availability
+            # This session's own hold (from an earlier confirm prompt) still counts as open
+            slots = self.availability_tool.get_slots(
+                date=request.date,
+                start_time=request.start_time,
+                end_time=request.end_time,
+                session_id=self.orchestrator.current_session
+            )
+            if not slots:
+                return f"No available marketing meetings on {request.date}. Please choose another date."
+
+            # Find the slot at the requested time
+            matching_slot = next((slot for slot in slots if slot.time == request.time), None)
 
             if not matching_slot:
                 # Get alternative times
@@ -201,10 +203,32 @@ class MarketingAgent:
                     return f"No available times near {request.time}. Please choose another time."
             
             # Store slot details for booking
-            request.marketer_id = matching_slot['marketer_id']
+            request.marketer_id = matching_slot.marketer_id
         except:
             return "Error processing availability. Please try again."
 
+        # Reserve the slot while the user confirms so another session cannot take it
+        previous_hold = session_data.pop('slot_hold', None)
+        hold_id = self.db_manager.place_hold(
+            "marketing",
+            request.marketer_id,
+            matching_slot.datetime,
+            session_id=self.orchestrator.current_session
+        )
+        # A re-hold of the same slot already replaced it; any other earlier slot is freed
+        if previous_hold:
+            self.db_manager.release_hold(previous_hold['kind'], previous_hold['hold_id'])
+        if not hold_id:
+            session_data.pop('pending_confirmation', None)
+            return f"Sorry, {request.time} on {request.date} was just taken. Please choose another time."
+        # Slot key travels with the hold so the confirm turn books it directly
+        session_data['slot_hold'] = {
+            "kind": "marketing",
+            "hold_id": hold_id,
+            "resource_id": request.marketer_id,
+            "slot_datetime": matching_slot.datetime
+        }
+
         # Format confirmation
         confirmation = (
             f"Please confirm your marketing meeting:\n"
@@ -212,7 +236,7 @@ class MarketingAgent:
             f"Email: {request.contact_email}\n"
             f"Date: {request.date} at {request.time}\n"
             f"Product Interest: {request.product_interest or 'General'}\n"
-            f"Marketer: {matching_slot['marketer']}\n\n"
+            f"Marketer: {matching_slot.marketer}\n\n"
             "Reply 'YES' to confirm or 'NO' to make changes."
         )
 
@@ -4,9 +4,11 @@ from dotenv import load_dotenv
 from .main_agent import MainOrchestratorAgent
 from .agents import ClinicalAgent, MarketingAgent, KnowledgeAgent
 from .database.manager import DatabaseManager
+from .knowledge_base.cache import AnswerCache
 from .knowledge_base.manager import KnowledgeBaseManager
+from .knowledge_base.watcher import KnowledgeBaseWatcher
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from typing import Dict
+from typing import Dict, Optional
 from .models.appointments import AppointmentRequest, MarketingMeetingRequest 
 
 # Load environment variables from .env file
@@ -17,7 +19,9 @@ KNOWLEDGE_BASE_PATH = "knowledge_base/"
 class COBCustomerCareSystem:
     def __init__(self, clinic_db_path: str = "clinic_appointments_2.db",
                  cob_db_path: str = "cob_system_2.db",
-                 knowledge_base_path: str = "knowledge_base/"):
+                 knowledge_base_path: str = "knowledge_base/",
+                 kb_watch_interval: Optional[float] = None,
+                 answer_cache: Optional[AnswerCache] = None):
         # Get API key from environment
         google_api_key = os.getenv("GOOGLE_API_KEY")
         if not google_api_key:
@@ -29,7 +33,15 @@ class COBCustomerCareSystem:
         )
         
         self.db_manager = DatabaseManager(clinic_db_path, cob_db_path)
-        self.kb_manager = KnowledgeBaseManager(knowledge_base_path)
+        self.kb_manager = KnowledgeBaseManager(knowledge_base_path, cob_db_path=cob_db_path)
+
+        # Hot-reload knowledge files when KB_WATCH_INTERVAL (seconds) is set
+        if kb_watch_interval is None and os.getenv("KB_WATCH_INTERVAL"):
+            kb_watch_interval = float(os.getenv("KB_WATCH_INTERVAL"))
+        self.kb_watcher = None
+        if kb_watch_interval:
+            self.kb_watcher = KnowledgeBaseWatcher(self.kb_manager, interval=kb_watch_interval)
+            self.kb_watcher.start()
         
         self.orchestrator = MainOrchestratorAgent(
             self.llm, 
@@ -50,10 +62,12 @@ class COBCustomerCareSystem:
             self.orchestrator
         )
         
+        # Systems serving different users may share one answer cache
         self.orchestrator.knowledge_agent = KnowledgeAgent(
             self.llm,
             self.kb_manager,
-            self.orchestrator
+            self.orchestrator,
+            answer_cache=answer_cache
         )
         
         self.session_data = {}
@@ -87,6 +101,10 @@ class COBCustomerCareSystem:
                 # FIXED: Clear from orchestrator.session_data
                 if session_id in self.orchestrator.session_data:
                     self.orchestrator.session_data[session_id].pop('pending_confirmation', None)
+                    # Free the reserved slot for other sessions
+                    hold = self.orchestrator.session_data[session_id].pop('slot_hold', None)
+                    if hold:
+                        self.db_manager.release_hold(hold['kind'], hold['hold_id'])
                 return "Let's make changes. What would you like to change?"
 
         # Process message
@@ -116,49 +134,35 @@ class COBCustomerCareSystem:
         if not request_data:
             return "Error: No pending booking found."
 
+        # Slot reserved when the confirmation prompt was shown, keyed by resource and time
+        slot = session_data.pop('slot_hold', None)
+        if not slot:
+            return "Booking failed: the selected time is no longer reserved. Please choose a time again."
+
         # Determine booking type based on the request data content
-        if "clinical_request" in session_data:
+        if slot['kind'] == "clinic":
             # Clinical appointment
             clinical_request = session_data.get('clinical_request', {})
             tool = self.orchestrator.clinical_agent.tools["appointment_booker"]
             result = tool._run(
                 clinic_id=clinical_request['clinic_id'],
                 doctor_name=clinical_request['doctor_name'],
-                slot_datetime=f"{clinical_request['date']} {clinical_request['time']}",
+                slot_datetime=slot['slot_datetime'],
                 patient_name=clinical_request['customer_name'],
-                contact_email=clinical_request['contact_email']
+                contact_email=clinical_request['contact_email'],
+                hold_id=slot['hold_id'],
+                doctor_id=slot['resource_id']
             )
         else:
             # Marketing meeting
-            marketing_request = session_data.get('marketing_request', {})
-            availability = self.orchestrator.marketing_agent.availability_tool._run(date=marketing_request['date'])
-            try:
-                import json
-                slots = json.loads(availability)
-                if slots and isinstance(slots, list):
-                    # Find a slot that matches the requested time
-                    matching_slot = None
-                    request_time = marketing_request['time']
-                    for slot in slots:
-                        slot_time = slot['datetime'].split()[1][:8]  # Extract HH:MM
-                        if slot_time == request_time:
-                            matching_slot = slot
-                            break
-
-                    if matching_slot:
-                        marketer_id = matching_slot['marketer_id']
-                    else:
-                        marketer_id = slots[0]['marketer_id']  # Use first available
-                else:
-                    marketer_id = 'marketer-0'  # Default fallback
-            except:
-                marketer_id = 'marketer-0'  # Default fallback
+            marketing_request = session_data.get('marketing_request') or request_data
             tool = self.orchestrator.marketing_agent.booking_tool
             result = tool._run(
-                marketer_id=marketer_id,
-                slot_datetime=f"{marketing_request['date']} {marketing_request['time']}",
+                marketer_id=slot['resource_id'],
+                slot_datetime=slot['slot_datetime'],
                 customer_name=marketing_request['customer_name'],
-                contact_email=marketing_request['contact_email']
+                contact_email=marketing_request['contact_email'],
+                hold_id=slot['hold_id']
             )
 
         return result if "Successfully" in result else f"Booking failed: {result}"
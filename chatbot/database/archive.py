@@ -0,0 +1,133 @@
+import os
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional
+
+# Hot tables per kind that hold dated rows: (table, resource id column)
+ARCHIVE_TABLES = {
+    "clinic": [("appointments", "doctor_id"), ("slot_exceptions", "resource_id")],
+    "marketing": [("marketing_availability", "marketer_id"), ("slot_exceptions", "resource_id")]
+}
+
+
+def archive_path(db_path: str) -> str:
+    """Default archive file next to a hot database: clinic.db -> clinic_archive.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+class SlotArchiver:
+    """Moves past slots out of the hot tables into an archive database file
+
+    Booked past slots are copied to a table of the same name in the archive
+    file (CLINIC_ARCHIVE_DB_PATH / COB_ARCHIVE_DB_PATH, default
+    <db>_archive.db) and deleted from the hot table; never-booked past slots
+    carry no history and are only deleted. Work is done in batches walking
+    rowid order, each in its own short transaction, so bookings are not
+    blocked for long and an interrupted run simply continues next time.
+    """
+
+    def __init__(self, db_manager, batch_size: int = 10_000):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.archive_paths = {
+            "clinic": os.getenv("CLINIC_ARCHIVE_DB_PATH", archive_path(db_manager.clinic_db_path)),
+            "marketing": os.getenv("COB_ARCHIVE_DB_PATH", archive_path(db_manager.cob_db_path))
+        }
+
+    def _connect(self, kind: str) -> sqlite3.Connection:
+        db_path, _, _ = self.db_manager._hold_target(kind)
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_paths[kind],))
+        return conn
+
+    def _ensure_archive_table(self, conn: sqlite3.Connection, table: str, id_column: str):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+        # Unique key makes a re-copied batch (after a crash between files) harmless
+        conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_{table}_history "
+            f"ON {table} ({id_column}, slot_datetime)"
+        )
+
+    def _archive_table(self, conn: sqlite3.Connection, table: str, id_column: str, cutoff: str) -> Dict[str, int]:
+        booked = "available = 'False'" if table != "slot_exceptions" else "1"
+        moved = purged = 0
+        last_rowid = -1
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                batch = conn.execute(
+                    f"SELECT rowid, {booked} FROM main.{table} WHERE rowid > ? AND slot_datetime < ? "
+                    "ORDER BY rowid LIMIT ?",
+                    (last_rowid, cutoff, self.batch_size)
+                ).fetchall()
+                if not batch:
+                    conn.execute("COMMIT")
+                    break
+                last_rowid = batch[-1][0]
+                keep = [rowid for rowid, is_booked in batch if is_booked]
+                if keep:
+                    placeholders = ", ".join("?" for _ in keep)
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO archive.{table} "
+                        f"SELECT * FROM main.{table} WHERE rowid IN ({placeholders})",
+                        keep
+                    )
+                placeholders = ", ".join("?" for _ in batch)
+                conn.execute(
+                    f"DELETE FROM main.{table} WHERE rowid IN ({placeholders})",
+                    [rowid for rowid, _ in batch]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            moved += len(keep)
+            purged += len(batch) - len(keep)
+        return {"moved": moved, "purged": purged}
+
+    def archive(self, kind: str, before: Optional[date] = None) -> Dict[str, Dict[str, int]]:
+        """Archive slots dated before `before` (default today); returns row counts per table"""
+        cutoff = f"{before or date.today()} 00:00:00"
+        counts = {}
+        conn = self._connect(kind)
+        try:
+            for table, id_column in ARCHIVE_TABLES[kind]:
+                self._ensure_archive_table(conn, table, id_column)
+                counts[table] = self._archive_table(conn, table, id_column, cutoff)
+        finally:
+            conn.close()
+        return counts
+
+    def archive_all(self, before: Optional[date] = None) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return {kind: self.archive(kind, before) for kind in ARCHIVE_TABLES}
+
+    def booking_history(self, kind: str, resource_id: str = None, start: str = None,
+                        end: str = None, limit: int = 100) -> List[sqlite3.Row]:
+        """Archived bookings, newest first, optionally for one resource and a date range"""
+        table, id_column = ARCHIVE_TABLES[kind][0]
+        if self.db_manager.templates:
+            table, id_column = ARCHIVE_TABLES[kind][1]
+        if not os.path.exists(self.archive_paths[kind]):
+            return []
+
+        query = f"SELECT * FROM {table} WHERE 1=1"
+        params = []
+        if resource_id:
+            query += f" AND {id_column} = ?"
+            params.append(resource_id)
+        if start:
+            query += " AND slot_datetime >= ?"
+            params.append(start)
+        if end:
+            query += " AND slot_datetime <= ?"
+            params.append(end)
+        query += " ORDER BY slot_datetime DESC LIMIT ?"
+        params.append(limit)
+
+        with sqlite3.connect(self.archive_paths[kind]) as conn:
+            conn.row_factory = sqlite3.Row
+            try:
+                return conn.execute(query, params).fetchall()
+            except sqlite3.OperationalError:
+                return []  # nothing archived for this table yet
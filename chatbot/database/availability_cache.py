@@ -0,0 +1,172 @@
+import time
+import sqlite3
+import threading
+from uuid import uuid4
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+
+class AvailabilityMetrics:
+    """Thread-safe counters describing availability cache effectiveness"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0     # entries dropped or found stale after a change
+        self.resets = 0            # whole cache dropped (directory change, reload, log gap)
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "resets": self.resets,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class AvailabilityCache:
+    """Availability query results keyed by normalized parameters
+
+    Invalidation is driven by the change log (changes.py): every change to
+    a slot, hold or exception bumps a version for its (resource, date) and
+    for the date as a whole. An entry for specific resources (a doctor or
+    marketer filter) stays valid while those resources' versions for its
+    date are unchanged; an unfiltered entry depends on the date version.
+    A working_hours change bumps its resource on every date; directory
+    changes, table reloads and gaps in the log clear the cache.
+    The log is polled at most every poll_interval seconds, and immediately
+    after this process's own writes, so other workers' bookings are picked
+    up too. An entry also expires when a hold hiding one of its slots
+    lapses, since expiry writes nothing.
+
+    Every prune_interval seconds the cache records how far it has read and
+    prunes the log below the lowest position of any live reader, so the
+    log stays bounded without pulling entries from under another worker.
+    """
+
+    def __init__(self, db_manager, max_entries: int = 1024, poll_interval: float = 1.0,
+                 max_age: float = 300.0, prune_interval: float = 60.0):
+        self.db_manager = db_manager
+        self.max_entries = max_entries
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self.reader_id = uuid4().hex
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[tuple, float, list]]" = OrderedDict()
+        self._versions: Dict[Tuple[str, Optional[str], str], int] = {}
+        self._seq: Dict[str, int] = {}
+        self._polled: Dict[str, float] = {}
+        self._pruned: Dict[str, float] = {}
+        self.metrics = AvailabilityMetrics()
+
+    # ---- versions ----
+
+    def _bump(self, kind: str, resource_id: Optional[str], day: Optional[str]):
+        """New version for resource_id on day; day None means on every date"""
+        for key in ((kind, resource_id, day), (kind, None, day)):
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _stamp(self, kind: str, day: str, resources: Optional[FrozenSet[str]]) -> tuple:
+        if resources is None:
+            return (self._versions.get((kind, None, day), 0), self._versions.get((kind, None, None), 0))
+        return tuple(
+            (self._versions.get((kind, resource_id, day), 0), self._versions.get((kind, resource_id, None), 0))
+            for resource_id in sorted(resources)
+        )
+
+    def _clear(self):
+        self.metrics.incr("invalidations", len(self._entries))
+        self.metrics.incr("resets")
+        self._entries.clear()
+
+    def sync(self, kind: str, force: bool = False):
+        """Apply change-log entries written since the last poll (by any process)"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._polled.get(kind, 0.0) < self.poll_interval:
+                return
+            self._polled[kind] = now
+            if kind not in self._seq:
+                self._seq[kind] = self.db_manager.latest_change_seq(kind)
+                self._pruned[kind] = now
+                self.db_manager.record_change_reader(kind, self.reader_id, self._seq[kind])
+                return
+            while True:
+                changes = self.db_manager.changes_since(kind, self._seq[kind])
+                if not changes:
+                    if self.db_manager.latest_change_seq(kind) < self._seq[kind]:
+                        # The log went backwards: the database file was replaced
+                        self._clear()
+                        self._seq[kind] = self.db_manager.latest_change_seq(kind)
+                    break
+                if changes[0].seq > self._seq[kind] + 1:
+                    # Entries we never saw were pruned; nothing cached can be trusted
+                    self._clear()
+                for change in changes:
+                    if change.slot_datetime:
+                        self._bump(kind, change.resource_id, change.slot_datetime[:10])
+                    elif change.table_name == "working_hours":
+                        # A weekly template change may open or close slots on any date
+                        self._bump(kind, change.resource_id, None)
+                    else:
+                        # Directory rows and reloaded tables change what every query may return
+                        self._clear()
+                self._seq[kind] = changes[-1].seq
+
+            if now - self._pruned[kind] >= self.prune_interval:
+                self._pruned[kind] = now
+                self.db_manager.record_change_reader(kind, self.reader_id, self._seq[kind])
+                self.db_manager.prune_changes(kind)
+
+    # ---- lookups ----
+
+    def _hold_expiry(self, kind: str, day: str) -> float:
+        """Earliest expiry of a live hold on day, as a time.time() value (inf if none)"""
+        db_path, _, _ = self.db_manager._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            expiry = conn.execute(
+                "SELECT MIN(expires_at) FROM slot_holds WHERE slot_datetime >= ? AND slot_datetime < ? AND expires_at > ?",
+                (f"{day} 00:00:00", f"{date.fromisoformat(day) + timedelta(days=1)} 00:00:00", time.time())
+            ).fetchone()[0]
+        return expiry if expiry is not None else float("inf")
+
+    def get(self, kind: str, day: str, resources: Optional[List[str]], params: tuple,
+            loader: Callable[[], list]) -> list:
+        """Cached loader() for an availability query on day, optionally limited to resources"""
+        self.sync(kind)
+        resources = frozenset(resources) if resources else None
+        key = (kind, day, resources, params)
+        with self._lock:
+            stamp = self._stamp(kind, day, resources)
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp and time.time() < entry[1]:
+                self._entries.move_to_end(key)
+                self.metrics.incr("hits")
+                return list(entry[2])
+            if entry:
+                self.metrics.incr("invalidations")
+            self.metrics.incr("misses")
+
+        expires = min(time.time() + self.max_age, self._hold_expiry(kind, day))
+        result = loader()
+        with self._lock:
+            # A write between stamp and load would make the result stale under the old stamp
+            if self._stamp(kind, day, resources) == stamp:
+                self._entries[key] = (stamp, expires, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return list(result)
+
+    def __len__(self) -> int:
+        return len(self._entries)
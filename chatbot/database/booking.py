@@ -0,0 +1,309 @@
+import time
+import random
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+BOOKING_REQUESTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS booking_requests (
+    idempotency_key TEXT PRIMARY KEY,
+    booked BOOLEAN,
+    appointment_id TEXT,
+    reason TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def migrate_booking_requests(conn: sqlite3.Connection):
+    """Add columns introduced after a database's booking_requests table was created"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(booking_requests)")}
+    if "reason" not in columns:
+        conn.execute("ALTER TABLE booking_requests ADD COLUMN reason TEXT")
+
+
+# Slot tables per booking kind: (table, resource id column)
+SLOT_TABLES = {
+    "clinic": ("appointments", "doctor_id"),
+    "marketing": ("marketing_availability", "marketer_id")
+}
+
+
+@dataclass
+class BookingResult:
+    booked: bool
+    appointment_id: Optional[str] = None
+    replayed: bool = False        # answered from an earlier request with the same key
+    reason: Optional[str] = None
+
+
+class BookingMetrics:
+    """Thread-safe counters describing booking contention"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0          # transactions started, including retries
+        self.booked = 0
+        self.conflicts = 0         # slot already taken / hold expired
+        self.replays = 0           # duplicate submissions answered idempotently
+        self.busy_retries = 0      # SQLITE_BUSY retried with backoff
+        self.busy_failures = 0     # gave up after max retries
+        self.total_seconds = 0.0
+
+    def incr(self, name: str, amount: float = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            requests = self.booked + self.conflicts + self.replays + self.busy_failures
+            return {
+                "attempts": self.attempts,
+                "booked": self.booked,
+                "conflicts": self.conflicts,
+                "replays": self.replays,
+                "busy_retries": self.busy_retries,
+                "busy_failures": self.busy_failures,
+                "avg_latency_ms": 1000 * self.total_seconds / requests if requests else 0.0
+            }
+
+
+def is_busy_error(error: Exception) -> bool:
+    """SQLITE_BUSY / SQLITE_LOCKED surfaced by the sqlite3 module"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class BookingService:
+    """Idempotent, contention-aware booking writes
+
+    Every booking runs in one BEGIN IMMEDIATE transaction. An idempotency key
+    (the hold ID for confirmed holds) records the outcome in booking_requests
+    inside the same transaction, so a double-submitted confirmation returns
+    the first result instead of booking or failing twice. SQLITE_BUSY is
+    retried a bounded number of times with jittered exponential backoff.
+    """
+
+    def __init__(self, db_manager, max_retries: int = 6, base_delay: float = 0.01,
+                 max_delay: float = 0.5, busy_timeout: float = 0.25):
+        self.db_manager = db_manager
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.busy_timeout = busy_timeout
+        self.metrics = BookingMetrics()
+
+    def _db_path(self, kind: str) -> str:
+        if kind == "clinic":
+            return self.db_manager.clinic_db_path
+        if kind == "marketing":
+            return self.db_manager.cob_db_path
+        raise ValueError(f"Unknown booking kind: {kind}")
+
+    def _run_many(self, kind: str, idempotency_keys: List[Optional[str]], body,
+                  on_booked: Optional[Callable[[sqlite3.Connection], None]] = None) -> List[BookingResult]:
+        """Run body(conn) -> results in a write transaction with idempotency and busy retries
+
+        idempotency_keys has one entry per result. Keys are recorded together
+        in the same transaction, so a replay finds either all or none of them.
+        on_booked(conn) runs in that transaction when anything was booked (not
+        on replays), for writes that must commit or roll back with the booking.
+        """
+        started = time.perf_counter()
+        db_path = self._db_path(kind)
+        keys = [key for key in idempotency_keys if key]
+        try:
+            for attempt in range(self.max_retries + 1):
+                self.metrics.incr("attempts")
+                try:
+                    with self.db_manager.immediate_transaction(db_path, timeout=self.busy_timeout) as conn:
+                        if keys:
+                            placeholders = ", ".join("?" for _ in keys)
+                            previous = {
+                                key: (booked, appointment_id, reason)
+                                for key, booked, appointment_id, reason in conn.execute(
+                                    "SELECT idempotency_key, booked, appointment_id, reason FROM booking_requests "
+                                    f"WHERE idempotency_key IN ({placeholders})",
+                                    keys
+                                )
+                            }
+                            if previous:
+                                self.metrics.incr("replays", len(previous))
+                                return [
+                                    BookingResult(bool(previous[key][0]), previous[key][1], True, previous[key][2])
+                                    if key in previous else BookingResult(False, reason="unknown request")
+                                    for key in idempotency_keys
+                                ]
+
+                        results = body(conn)
+                        if on_booked and any(result.booked for result in results):
+                            on_booked(conn)
+                        if keys:
+                            conn.executemany(
+                                "INSERT INTO booking_requests (idempotency_key, booked, appointment_id, reason) "
+                                "VALUES (?, ?, ?, ?)",
+                                [
+                                    (key, result.booked, result.appointment_id, result.reason)
+                                    for key, result in zip(idempotency_keys, results) if key
+                                ]
+                            )
+                    for result in results:
+                        self.metrics.incr("booked" if result.booked else "conflicts")
+                    if any(result.booked for result in results):
+                        self.db_manager.availability_cache.sync(kind, force=True)
+                    return results
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e):
+                        raise
+                    if attempt == self.max_retries:
+                        self.metrics.incr("busy_failures")
+                        return [
+                            BookingResult(False, reason="database busy, please try again")
+                            for _ in idempotency_keys
+                        ]
+                    self.metrics.incr("busy_retries")
+                    # Full jitter keeps contending writers from retrying in lockstep
+                    time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+        finally:
+            self.metrics.incr("total_seconds", time.perf_counter() - started)
+
+    def _run(self, kind: str, idempotency_key: Optional[str], body,
+             on_booked: Optional[Callable[[sqlite3.Connection], None]] = None) -> BookingResult:
+        """Single-booking form of _run_many"""
+        return self._run_many(kind, [idempotency_key], lambda conn: [body(conn)], on_booked)[0]
+
+    def book_slot(self, kind: str, match: Dict[str, str], assignments: Dict[str, str],
+                  idempotency_key: Optional[str] = None,
+                  on_booked: Optional[Callable[[sqlite3.Connection], None]] = None) -> BookingResult:
+        """Book the available slot matching the match columns
+
+        Slots held by a confirmation in progress are not bookable this way.
+        """
+        table, id_column = SLOT_TABLES[kind]
+
+        def body(conn):
+            templates = self.db_manager.templates
+            if templates:
+                slot_datetime = match["slot_datetime"]
+                resources = templates.resolve_resources(conn, kind, match)
+                open_slots = templates.open_slots(conn, [(resource_id, slot_datetime) for resource_id in resources])
+                if not open_slots:
+                    return BookingResult(False, reason="slot no longer available")
+                templates.claim(conn, [(*min(open_slots), assignments)])
+                return BookingResult(True, assignments.get("appointment_id"))
+
+            conditions = " AND ".join(f"{column} = ?" for column in match)
+            columns = ", ".join(f"{column} = ?" for column in assignments)
+            cursor = conn.execute(
+                f"UPDATE {table} SET available = 'False', {columns} "
+                f"WHERE {conditions} AND available = 'True' "
+                f"AND NOT EXISTS ("
+                f"SELECT 1 FROM slot_holds h WHERE h.resource_id = {table}.{id_column} "
+                f"AND h.slot_datetime = {table}.slot_datetime AND h.expires_at > ?)",
+                (*assignments.values(), *match.values(), time.time())
+            )
+            if cursor.rowcount == 0:
+                return BookingResult(False, reason="slot no longer available")
+            return BookingResult(True, assignments.get("appointment_id"))
+
+        return self._run(kind, idempotency_key, body, on_booked)
+
+    def commit_hold(self, kind: str, hold_id: str, assignments: Dict[str, str],
+                    idempotency_key: Optional[str] = None,
+                    on_booked: Optional[Callable[[sqlite3.Connection], None]] = None) -> BookingResult:
+        """Book a held slot; the hold ID doubles as the default idempotency key"""
+        table, id_column = SLOT_TABLES[kind]
+
+        def body(conn):
+            hold = conn.execute(
+                "SELECT resource_id, slot_datetime FROM slot_holds WHERE hold_id = ? AND expires_at > ?",
+                (hold_id, time.time())
+            ).fetchone()
+            conn.execute("DELETE FROM slot_holds WHERE hold_id = ?", (hold_id,))
+            if not hold:
+                return BookingResult(False, reason="reservation expired")
+
+            templates = self.db_manager.templates
+            if templates:
+                # The hold itself was just deleted, so only exceptions can conflict
+                if not templates.open_slots(conn, [hold]):
+                    return BookingResult(False, reason="slot no longer available")
+                templates.claim(conn, [(*hold, assignments)])
+                return BookingResult(True, assignments.get("appointment_id"))
+
+            columns = ", ".join(f"{column} = ?" for column in assignments)
+            cursor = conn.execute(
+                f"UPDATE {table} SET available = 'False', {columns} "
+                f"WHERE {id_column} = ? AND slot_datetime = ? AND available = 'True'",
+                (*assignments.values(), *hold)
+            )
+            if cursor.rowcount != 1:
+                return BookingResult(False, reason="slot no longer available")
+            return BookingResult(True, assignments.get("appointment_id"))
+
+        return self._run(kind, idempotency_key or hold_id, body, on_booked)
+
+    def book_many(self, kind: str, slots: List[Tuple[str, str]], assignments: List[Dict[str, str]],
+                  all_or_nothing: bool = True, idempotency_key: Optional[str] = None,
+                  on_booked: Optional[Callable[[sqlite3.Connection], None]] = None) -> List[BookingResult]:
+        """Book several (resource_id, slot_datetime) slots in one transaction
+
+        Every slot is validated with a single query and the open ones are
+        booked with one executemany. Returns one result per slot, in order.
+        With all_or_nothing, nothing is booked unless every slot is open.
+        Each assignments dict must use the same columns.
+        """
+        table, id_column = SLOT_TABLES[kind]
+        if len(slots) != len(assignments):
+            raise ValueError("slots and assignments must have the same length")
+        if not slots:
+            return []
+        slots = [tuple(slot) for slot in slots]
+
+        def body(conn):
+            outcomes: List[Optional[BookingResult]] = [None] * len(slots)
+            seen = set()
+            for i, slot in enumerate(slots):
+                if slot in seen:
+                    outcomes[i] = BookingResult(False, reason="duplicate slot in request")
+                seen.add(slot)
+
+            templates = self.db_manager.templates
+            if templates:
+                open_slots = templates.open_slots(conn, seen)
+            else:
+                values = ", ".join("(?, ?)" for _ in seen)
+                open_slots = set(conn.execute(
+                    f"SELECT {id_column}, slot_datetime FROM {table} "
+                    f"WHERE ({id_column}, slot_datetime) IN (VALUES {values}) AND available = 'True' "
+                    f"AND NOT EXISTS ("
+                    f"SELECT 1 FROM slot_holds h WHERE h.resource_id = {table}.{id_column} "
+                    f"AND h.slot_datetime = {table}.slot_datetime AND h.expires_at > ?)",
+                    (*[value for slot in seen for value in slot], time.time())
+                ).fetchall())
+            for i, slot in enumerate(slots):
+                if outcomes[i] is None and slot not in open_slots:
+                    outcomes[i] = BookingResult(False, reason="slot no longer available")
+
+            if all_or_nothing and any(outcomes):
+                return [
+                    outcome or BookingResult(False, reason="another slot in the group is unavailable")
+                    for outcome in outcomes
+                ]
+
+            todo = [i for i, outcome in enumerate(outcomes) if outcome is None]
+            if templates:
+                templates.claim(conn, [(*slots[i], assignments[i]) for i in todo])
+            else:
+                columns = ", ".join(f"{column} = ?" for column in assignments[0])
+                conn.executemany(
+                    f"UPDATE {table} SET available = 'False', {columns} "
+                    f"WHERE {id_column} = ? AND slot_datetime = ? AND available = 'True'",
+                    [(*assignments[i].values(), *slots[i]) for i in todo]
+                )
+            for i in todo:
+                outcomes[i] = BookingResult(True, assignments[i].get("appointment_id"))
+            return outcomes
+
+        keys = [f"{idempotency_key}:{i}" if idempotency_key else None for i in range(len(slots))]
+        return self._run_many(kind, keys, body, on_booked)
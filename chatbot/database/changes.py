@@ -0,0 +1,81 @@
+import sqlite3
+from typing import List, NamedTuple, Optional
+
+# Append-only change log written by triggers; seq is monotonically increasing per database
+CHANGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    op TEXT NOT NULL,
+    resource_id TEXT,
+    slot_datetime DATETIME
+)
+"""
+
+# Last seq each live poller (one per process) has consumed; pruning never passes the lowest
+CHANGE_READERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_readers (
+    reader_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    seen_at REAL NOT NULL
+)
+"""
+
+# A reader silent for this long is gone; if it comes back it sees a gap and starts over
+READER_TTL_SECONDS = 600
+
+# Tracked tables per database kind: table -> (resource id column, slot column or None).
+# Rows without a slot column (directory, weekly templates) affect every date
+TRACKED_TABLES = {
+    "clinic": {
+        "appointments": ("doctor_id", "slot_datetime"),
+        "slot_holds": ("resource_id", "slot_datetime"),
+        "slot_exceptions": ("resource_id", "slot_datetime"),
+        "clinics": ("clinic_id", None),
+        "doctors": ("doctor_id", None),
+        "working_hours": ("resource_id", None)
+    },
+    "marketing": {
+        "marketing_availability": ("marketer_id", "slot_datetime"),
+        "slot_holds": ("resource_id", "slot_datetime"),
+        "slot_exceptions": ("resource_id", "slot_datetime"),
+        "marketers": ("marketer_id", None),
+        "working_hours": ("resource_id", None)
+    }
+}
+
+
+class Change(NamedTuple):
+    seq: int
+    table_name: str
+    op: str                       # 'I'nsert, 'U'pdate, 'D'elete or 'R'eset (table reloaded)
+    resource_id: Optional[str]    # doctor_id / marketer_id / clinic_id; None for a reset
+    slot_datetime: Optional[str]  # None for directory, template and reset rows
+
+
+def change_triggers(table: str, id_column: str, slot_column: Optional[str]) -> List[str]:
+    """AFTER INSERT/UPDATE/DELETE triggers logging one row per changed row of table"""
+    triggers = []
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        slot = f"{row}.{slot_column}" if slot_column else "NULL"
+        triggers.append(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_{event.lower()} AFTER {event} ON {table}
+        BEGIN
+            INSERT INTO changes (table_name, op, resource_id, slot_datetime)
+            VALUES ('{table}', '{event[0]}', {row}.{id_column}, {slot});
+        END
+        """)
+    return triggers
+
+
+def init_change_log(conn: sqlite3.Connection, kind: str):
+    conn.execute(CHANGES_SCHEMA)
+    conn.execute(CHANGE_READERS_SCHEMA)
+    for table, (id_column, slot_column) in TRACKED_TABLES[kind].items():
+        for ddl in change_triggers(table, id_column, slot_column):
+            conn.execute(ddl)
+
+
+def log_reset(conn: sqlite3.Connection, table: str):
+    """Record that table was reloaded wholesale (no triggers fired), so pollers drop everything"""
+    conn.execute("INSERT INTO changes (table_name, op) VALUES (?, 'R')", (table,))
@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+# Dimension tables: one row per clinic, doctor and marketer. Slot rows keep
+# their denormalized name columns and reference these by ID.
+CLINIC_DIRECTORY_SCHEMAS = ["""
+CREATE TABLE IF NOT EXISTS clinics (
+    clinic_id TEXT PRIMARY KEY,
+    clinic_name TEXT
+)
+""", """
+CREATE TABLE IF NOT EXISTS doctors (
+    doctor_id TEXT PRIMARY KEY,
+    doctor_name TEXT,
+    specialty TEXT,
+    clinic_id TEXT REFERENCES clinics (clinic_id)
+)
+"""]
+
+COB_DIRECTORY_SCHEMAS = ["""
+CREATE TABLE IF NOT EXISTS marketers (
+    marketer_id TEXT PRIMARY KEY,
+    marketer_name TEXT
+)
+"""]
+
+
+def migrate_directory(db_manager) -> Dict[str, int]:
+    """Fill empty directory tables from the slot tables (one-off full scan)
+
+    Returns the number of rows added per directory table.
+    """
+    added = {}
+    with sqlite3.connect(db_manager.clinic_db_path) as conn:
+        if not conn.execute("SELECT 1 FROM doctors LIMIT 1").fetchone():
+            added["clinics"] = conn.execute(
+                "INSERT OR IGNORE INTO clinics SELECT DISTINCT clinic_id, clinic_name FROM appointments"
+            ).rowcount
+            added["doctors"] = conn.execute("""
+                INSERT OR IGNORE INTO doctors
+                SELECT DISTINCT doctor_id, doctor_name, specialty, clinic_id FROM appointments
+            """).rowcount
+    with sqlite3.connect(db_manager.cob_db_path) as conn:
+        if not conn.execute("SELECT 1 FROM marketers LIMIT 1").fetchone():
+            added["marketers"] = conn.execute(
+                "INSERT OR IGNORE INTO marketers SELECT DISTINCT marketer_id, marketer_name FROM marketing_availability"
+            ).rowcount
+    return added
+
+
+# Schema-level version of the directory, bumped by triggers on every write
+DIRECTORY_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directory_version (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+)
+"""
+
+
+def directory_version_triggers(table: str) -> List[str]:
+    """Triggers bumping directory_version on any insert, update or delete of table"""
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_directory_{event.lower()} AFTER {event} ON {table}
+        BEGIN
+            UPDATE directory_version SET version = version + 1 WHERE id = 0;
+        END
+        """
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def init_directory_version(conn: sqlite3.Connection, tables: List[str]):
+    conn.execute(DIRECTORY_VERSION_SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO directory_version (id, version) VALUES (0, 0)")
+    for table in tables:
+        for ddl in directory_version_triggers(table):
+            conn.execute(ddl)
+
+
+class DirectoryCache:
+    """In-memory cache of directory query results and rendered text
+
+    Entries are tagged with the directory_version they were built from.
+    A lookup costs one primary-key read of the current version on a
+    persistent connection; the loader only runs again after a directory
+    write (from any process) has bumped the version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._entries: Dict[Tuple[str, Hashable], Tuple[int, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, db_path: str) -> int:
+        with self._lock:
+            return self._version(db_path)
+
+    def _version(self, db_path: str) -> int:
+        """Current directory version; the caller holds the lock"""
+        conn = self._connections.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._connections[db_path] = conn
+        return conn.execute("SELECT version FROM directory_version WHERE id = 0").fetchone()[0]
+
+    def get(self, db_path: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached loader() for key, rebuilt when db_path's directory version changed"""
+        with self._lock:
+            version = self._version(db_path)
+            entry = self._entries.get((db_path, key))
+            if entry and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Loaders may read other cached entries, so they run outside the lock
+        value = loader()
+        with self._lock:
+            current = self._entries.get((db_path, key))
+            # Never replace an entry a concurrent loader built from a newer version
+            if current is None or current[0] <= version:
+                self._entries[(db_path, key)] = (version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,60 +1,137 @@
 import os
+import time
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from uuid import uuid4
 from typing import List, Tuple, Optional, Dict
 from langchain.schema import Document
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from .availability_cache import AvailabilityCache
+from .booking import BOOKING_REQUESTS_SCHEMA, BookingService, migrate_booking_requests
+from .schedule import (
+    APPOINTMENTS_SCHEMA, MARKETING_AVAILABILITY_SCHEMA, WORKING_HOURS_SCHEMA, ensure_unique_slots
+)
+from .changes import READER_TTL_SECONDS, Change, init_change_log
+from .directory import (
+    CLINIC_DIRECTORY_SCHEMAS, COB_DIRECTORY_SCHEMAS, DirectoryCache, init_directory_version, migrate_directory
+)
+from .name_index import NameIndex
+from .template_schedule import SLOT_EXCEPTIONS_SCHEMA, SLOT_EXCEPTIONS_INDEX, TemplateSchedule, parse_day
+
+# How long a slot stays reserved while the user is asked to confirm
+HOLD_TTL_SECONDS = 300
+
+SLOT_HOLDS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slot_holds (
+    hold_id TEXT PRIMARY KEY,
+    resource_id TEXT,
+    slot_datetime DATETIME,
+    session_id TEXT,
+    expires_at REAL,
+    UNIQUE (resource_id, slot_datetime)
+)
+"""
+
+CUSTOMERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    signup_date TEXT,
+    status TEXT,
+    product_id TEXT
+)
+"""
+
+PRODUCTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    product_name TEXT,
+    description TEXT,
+    category TEXT
+)
+"""
+
+def placeholders(values: List[str]) -> str:
+    return ", ".join("?" for _ in values)
+
+
+def day_bounds(day) -> Tuple[str, str]:
+    """[start, end) slot_datetime strings covering one day"""
+    return f"{day} 00:00:00", f"{day + timedelta(days=1)} 00:00:00"
+
+
+# Storage models for schedules: one row per slot, or weekly templates plus exceptions
+SCHEDULE_BACKENDS = ("slots", "templates")
 
 # Database Connection Manager
 class DatabaseManager:
-    def __init__(self, clinic_db_path: str, cob_db_path: str):
+    def __init__(self, clinic_db_path: str, cob_db_path: str, schedule_backend: Optional[str] = None):
         self.clinic_db_path = clinic_db_path
         self.cob_db_path = cob_db_path
+        self.schedule_backend = schedule_backend or os.getenv("SCHEDULE_BACKEND", "slots")
+        if self.schedule_backend not in SCHEDULE_BACKENDS:
+            raise ValueError(f"Unknown schedule backend: {self.schedule_backend}")
         self.init_databases()
+        # Directory lookups are served from memory until a directory write bumps its version
+        self.directory_cache = DirectoryCache()
+        # Databases generated before the directory tables existed are migrated once
+        migrate_directory(self)
+
+        # Template backend: availability is computed from working_hours minus slot_exceptions
+        self.templates = TemplateSchedule(self) if self.schedule_backend == "templates" else None
+        if self.templates:
+            with sqlite3.connect(self.clinic_db_path) as conn:
+                migrated = conn.execute("SELECT 1 FROM slot_exceptions LIMIT 1").fetchone()
+            if not migrated:
+                self.templates.migrate_from_slots()
+
+        # Repeated availability queries are answered from memory until the change log touches them
+        self.availability_cache = AvailabilityCache(self)
+
+        # All booking writes go through here (idempotency, busy retries, metrics)
+        self.booking_service = BookingService(self)
 
     def init_databases(self):
         """Initialize database schemas if not exists"""
         # Clinic appointments schema
         with sqlite3.connect(self.clinic_db_path) as conn:
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS appointments (
-                clinic_id TEXT,
-                doctor_id TEXT,
-                doctor_name TEXT,
-                specialty TEXT,
-                clinic_name TEXT,
-                slot_datetime DATETIME,
-                available BOOLEAN DEFAULT 1,
-                appointment_id TEXT,
-                patient_name TEXT,
-                contact_email TEXT,
-                PRIMARY KEY (clinic_id, doctor_id, slot_datetime)
-            )
-            """)
+            # WAL lets readers proceed while a booking holds the write lock
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(APPOINTMENTS_SCHEMA)
+            ensure_unique_slots(conn, "appointments", "doctor_id")
+            conn.execute(SLOT_HOLDS_SCHEMA)
+            conn.execute(BOOKING_REQUESTS_SCHEMA)
+            migrate_booking_requests(conn)
+            conn.execute(WORKING_HOURS_SCHEMA)
+            conn.execute(SLOT_EXCEPTIONS_SCHEMA)
+            conn.execute(SLOT_EXCEPTIONS_INDEX)
+            for ddl in CLINIC_DIRECTORY_SCHEMAS:
+                conn.execute(ddl)
+            init_directory_version(conn, ["clinics", "doctors"])
+            init_change_log(conn, "clinic")
 
         # COB system schema
         with sqlite3.connect(self.cob_db_path) as conn:
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS marketing_availability (
-                marketer_id TEXT,
-                marketer_name TEXT,
-                slot_datetime DATETIME,
-                available BOOLEAN DEFAULT 1,
-                appointment_id TEXT,
-                customer_id TEXT,
-                PRIMARY KEY (marketer_id, slot_datetime)
-            )
-            """)
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                product_id TEXT PRIMARY KEY,
-                product_name TEXT,
-                description TEXT,
-                category TEXT
-            )
-            """)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(MARKETING_AVAILABILITY_SCHEMA)
+            ensure_unique_slots(conn, "marketing_availability", "marketer_id")
+            conn.execute(SLOT_HOLDS_SCHEMA)
+            conn.execute(BOOKING_REQUESTS_SCHEMA)
+            migrate_booking_requests(conn)
+            conn.execute(WORKING_HOURS_SCHEMA)
+            conn.execute(SLOT_EXCEPTIONS_SCHEMA)
+            conn.execute(SLOT_EXCEPTIONS_INDEX)
+            for ddl in COB_DIRECTORY_SCHEMAS:
+                conn.execute(ddl)
+            init_directory_version(conn, ["marketers"])
+            init_change_log(conn, "marketing")
+            conn.execute(CUSTOMERS_SCHEMA)
+            conn.execute(PRODUCTS_SCHEMA)
             conn.execute("""
             CREATE TABLE IF NOT EXISTS escalation_tickets (
                 ticket_id TEXT PRIMARY KEY,
@@ -66,12 +143,138 @@ class DatabaseManager:
             """)
 
 
+    def changes_since(self, kind: str, seq: int = 0, limit: int = 1000) -> List[Change]:
+        """Changes to slots and directory rows after seq, oldest first
+
+        Pollers keep the last seq they processed and invalidate exactly the
+        resources and dates listed, across processes.
+        """
+        db_path, _, _ = self._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            return [Change(*row) for row in conn.execute(
+                "SELECT seq, table_name, op, resource_id, slot_datetime FROM changes "
+                "WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, limit)
+            )]
+
+    def latest_change_seq(self, kind: str) -> int:
+        """Current end of the change log; start polling from here"""
+        db_path, _, _ = self._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def record_change_reader(self, kind: str, reader_id: str, seq: int):
+        """Note that reader_id has consumed the log up to seq (kept while it keeps polling)"""
+        db_path, _, _ = self._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO change_readers (reader_id, seq, seen_at) VALUES (?, ?, ?)",
+                (reader_id, seq, time.time())
+            )
+
+    def prune_changes(self, kind: str, up_to_seq: Optional[int] = None) -> int:
+        """Drop log entries every live poller has consumed (and at most up_to_seq); returns rows removed"""
+        db_path, _, _ = self._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM change_readers WHERE seen_at < ?", (time.time() - READER_TTL_SECONDS,))
+            bound = conn.execute(
+                "SELECT COALESCE((SELECT MIN(seq) FROM change_readers), (SELECT MAX(seq) FROM changes), 0)"
+            ).fetchone()[0]
+            if up_to_seq is not None:
+                bound = min(bound, up_to_seq)
+            return conn.execute("DELETE FROM changes WHERE seq <= ?", (bound,)).rowcount
+
     def get_clinic_connection(self):
         return sqlite3.connect(self.clinic_db_path)
 
     def get_cob_connection(self):
         return sqlite3.connect(self.cob_db_path)
 
+    @contextmanager
+    def immediate_transaction(self, db_path: str, timeout: float = 5.0):
+        """Connection inside a BEGIN IMMEDIATE transaction (write lock taken up front)"""
+        conn = sqlite3.connect(db_path, isolation_level=None, timeout=timeout)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _hold_target(self, kind: str):
+        """Database, slot table and resource column for a hold kind"""
+        if kind == "clinic":
+            return self.clinic_db_path, "appointments", "doctor_id"
+        if kind == "marketing":
+            return self.cob_db_path, "marketing_availability", "marketer_id"
+        raise ValueError(f"Unknown hold kind: {kind}")
+
+    def place_hold(self, kind: str, resource_id: str, slot_datetime: str,
+                   session_id: str = None, ttl: float = HOLD_TTL_SECONDS) -> Optional[str]:
+        """Reserve an available slot for ttl seconds; returns hold ID or None if taken"""
+        db_path, table, id_column = self._hold_target(kind)
+        now = time.time()
+        hold_id = str(uuid4())
+        with self.immediate_transaction(db_path) as conn:
+            # Expired holds no longer block anyone
+            conn.execute("DELETE FROM slot_holds WHERE expires_at <= ?", (now,))
+
+            # Re-holding for the same session extends the existing reservation
+            conn.execute(
+                "DELETE FROM slot_holds WHERE resource_id = ? AND slot_datetime = ? AND session_id = ?",
+                (resource_id, slot_datetime, session_id)
+            )
+
+            if self.templates:
+                available = self.templates.open_slots(conn, [(resource_id, slot_datetime)], ignore_holds=True)
+            else:
+                available = conn.execute(
+                    f"SELECT 1 FROM {table} WHERE {id_column} = ? AND slot_datetime = ? AND available = 'True'",
+                    (resource_id, slot_datetime)
+                ).fetchone()
+            if not available:
+                return None
+
+            try:
+                conn.execute(
+                    "INSERT INTO slot_holds (hold_id, resource_id, slot_datetime, session_id, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (hold_id, resource_id, slot_datetime, session_id, now + ttl)
+                )
+            except sqlite3.IntegrityError:
+                # Held by another session
+                return None
+        self.availability_cache.sync(kind, force=True)
+        return hold_id
+
+    def release_hold(self, kind: str, hold_id: str):
+        """Give up a hold (user declined or changed details)"""
+        db_path, _, _ = self._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM slot_holds WHERE hold_id = ?", (hold_id,))
+        self.availability_cache.sync(kind, force=True)
+
+    def _holding_session(self, kind: str, session_id: Optional[str], day) -> Optional[str]:
+        """session_id if it holds a slot on day, else None
+
+        Sessions without a hold see the same availability as everyone, so
+        their queries share cache entries instead of keying on the session.
+        """
+        if not session_id:
+            return None
+        db_path, _, _ = self._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            held = conn.execute(
+                "SELECT 1 FROM slot_holds WHERE session_id = ? AND slot_datetime >= ? AND slot_datetime < ? "
+                "AND expires_at > ? LIMIT 1",
+                (session_id, *day_bounds(day), time.time())
+            ).fetchone()
+        return session_id if held else None
+
     def save_escalation_ticket(self, ticket_id: str, session_id: str, history: str):
         """Save escalation ticket to database"""
         with sqlite3.connect(self.cob_db_path) as conn:
@@ -81,28 +284,49 @@ class DatabaseManager:
             )
             conn.commit()
 
-    def get_available_clinic_slots(self, date: str, specialty: str = None, doctor_name: str = None, start_time: str = None, end_time: str = None):
-        """Get available clinic slots with time range filtering"""
+    def get_available_clinic_slots(self, date: str, specialty: str = None, doctor_name: str = None, start_time: str = None, end_time: str = None,
+                                   session_id: str = None):
+        """Get available clinic slots with time range filtering (session_id's own holds stay visible)"""
+        doctor_ids = self.resolve_doctor_ids(doctor_name) if doctor_name else None
+        if doctor_ids == []:
+            return []
+        day = datetime.strptime(date, "%Y-%m-%d %H:%M:%S").date()
+        specialty = (specialty or "").strip().lower() or None
+        session_id = self._holding_session("clinic", session_id, day)
+        return self.availability_cache.get(
+            "clinic", str(day), doctor_ids, (specialty, start_time, end_time, session_id),
+            lambda: self._query_clinic_slots(day, specialty, doctor_ids, start_time, end_time, session_id)
+        )
+
+    def _query_clinic_slots(self, day, specialty: str = None, doctor_ids: List[str] = None,
+                            start_time: str = None, end_time: str = None, session_id: str = None):
+        if self.templates:
+            return self.templates.clinic_slots(day, specialty, doctor_ids, start_time, end_time, session_id)
+
         conn = self.get_clinic_connection()
         cursor = conn.cursor()
 
         query = """
         SELECT clinic_name, doctor_name, specialty, slot_datetime, clinic_id, doctor_id
         FROM appointments
-        WHERE available = 'True' AND DATE(slot_datetime) = ?
+        WHERE available = 'True' AND slot_datetime >= ? AND slot_datetime < ?
+        AND NOT EXISTS (
+            SELECT 1 FROM slot_holds h
+            WHERE h.resource_id = appointments.doctor_id AND h.slot_datetime = appointments.slot_datetime
+            AND h.expires_at > ? AND (? IS NULL OR h.session_id IS NOT ?)
+        )
         """
 
-        date = datetime.strptime(date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d")
-        
-        params = [date]
+        # A range on slot_datetime (not DATE()) lets (doctor_id, slot_datetime) serve the lookup
+        params = [*day_bounds(day), time.time(), session_id, session_id]
 
         if specialty:
             query += "AND LOWER(specialty) LIKE LOWER(?)"
             params.append(f"%{specialty}%")
 
-        if doctor_name:
-            query += "AND LOWER(doctor_name) LIKE LOWER(?)"
-            params.append(f"%{doctor_name}%")
+        if doctor_ids:
+            query += f"AND doctor_id IN ({placeholders(doctor_ids)})"
+            params.extend(doctor_ids)
 
         if start_time and end_time:
             query += "AND TIME(slot_datetime) BETWEEN ? AND ?"
@@ -120,20 +344,95 @@ class DatabaseManager:
         result = cursor.fetchall()
         return result
 
-    def get_available_marketing_slots(self, date: str, marketer_name: str = None, start_time: str = None, end_time: str = None):
-        """Get available marketing slots with time range filtering"""
+    def find_clinic_slot(self, slot_datetime: str, specialty: str = None, doctor_name: str = None,
+                         doctor_id: str = None, session_id: str = None) -> Optional[Tuple[str, str, str]]:
+        """Key (clinic_id, doctor_id, doctor_name) of an open slot at exactly slot_datetime
+
+        The slot may be held by session_id itself but not by anyone else.
+
+        With doctor_id (the doctor already shown to the user) only that
+        doctor's slot is considered; otherwise the first matching doctor by
+        name, then ID, so repeated lookups pick the same one.
+        """
+        if doctor_id:
+            doctor_ids = [doctor_id]
+        else:
+            doctor_ids = self.resolve_doctor_ids(doctor_name) if doctor_name else None
+            if doctor_ids == []:
+                return None
+        if self.templates:
+            slot_time = slot_datetime[11:]
+            matches = [
+                (name, resource_id, clinic_id)
+                for _, name, _, _, clinic_id, resource_id in self.templates.clinic_slots(
+                    parse_day(slot_datetime), None if doctor_id else specialty, doctor_ids, slot_time, slot_time,
+                    session_id
+                )
+            ]
+            if not matches:
+                return None
+            name, doctor_id, clinic_id = min(matches)
+            return clinic_id, doctor_id, name
+
+        query = """
+        SELECT clinic_id, doctor_id, doctor_name
+        FROM appointments
+        WHERE available = 'True' AND slot_datetime = ?
+        AND NOT EXISTS (
+            SELECT 1 FROM slot_holds h
+            WHERE h.resource_id = appointments.doctor_id AND h.slot_datetime = appointments.slot_datetime
+            AND h.expires_at > ? AND (? IS NULL OR h.session_id IS NOT ?)
+        )
+        """
+        params = [slot_datetime, time.time(), session_id, session_id]
+
+        if specialty and not doctor_id:
+            query += "AND LOWER(specialty) LIKE LOWER(?)"
+            params.append(f"%{specialty}%")
+
+        if doctor_ids:
+            query += f"AND doctor_id IN ({placeholders(doctor_ids)})"
+            params.extend(doctor_ids)
+
+        with self.get_clinic_connection() as conn:
+            return conn.execute(query + " ORDER BY doctor_name, doctor_id LIMIT 1", params).fetchone()
+
+    def get_available_marketing_slots(self, date: str, marketer_name: str = None, start_time: str = None, end_time: str = None,
+                                      session_id: str = None):
+        """Get available marketing slots with time range filtering (session_id's own holds stay visible)"""
+        marketer_ids = self.resolve_marketer_ids(marketer_name) if marketer_name else None
+        if marketer_ids == []:
+            return []
+        day = parse_day(date)
+        session_id = self._holding_session("marketing", session_id, day)
+        return self.availability_cache.get(
+            "marketing", str(day), marketer_ids, (start_time, end_time, session_id),
+            lambda: self._query_marketing_slots(day, marketer_ids, start_time, end_time, session_id)
+        )
+
+    def _query_marketing_slots(self, day, marketer_ids: List[str] = None,
+                               start_time: str = None, end_time: str = None, session_id: str = None):
+        if self.templates:
+            return self.templates.marketing_slots(day, marketer_ids, start_time, end_time, session_id)
+
         conn = self.get_cob_connection()
         cursor = conn.cursor()
 
         query = """
         SELECT marketer_name, slot_datetime, marketer_id
         FROM marketing_availability
-        WHERE available = 'True' AND DATE(slot_datetime) = ?
+        WHERE available = 'True' AND slot_datetime >= ? AND slot_datetime < ?
+        AND NOT EXISTS (
+            SELECT 1 FROM slot_holds h
+            WHERE h.resource_id = marketing_availability.marketer_id
+            AND h.slot_datetime = marketing_availability.slot_datetime
+            AND h.expires_at > ? AND (? IS NULL OR h.session_id IS NOT ?)
+        )
         """
-        params = [date]
-        if marketer_name:
-            query += " AND LOWER(marketer_name) LIKE LOWER(?)"
-            params.append(f"%{marketer_name}%")
+        params = [*day_bounds(day), time.time(), session_id, session_id]
+        if marketer_ids:
+            query += f" AND marketer_id IN ({placeholders(marketer_ids)})"
+            params.extend(marketer_ids)
 
         if start_time and end_time:
             query += " AND TIME(slot_datetime) BETWEEN ? AND ?"
@@ -153,36 +452,74 @@ class DatabaseManager:
 
     def get_doctors_by_specialty(self, specialty: str = None):
         """Get doctors with optional specialty filter"""
-        with sqlite3.connect(self.clinic_db_path) as conn:
-            cursor = conn.cursor()
-            if specialty:
-                cursor.execute(
-                    "SELECT DISTINCT doctor_name, specialty FROM appointments WHERE LOWER(specialty) LIKE LOWER(?)",
-                    (f"%{specialty}%",))
-            else:
-                cursor.execute("SELECT DISTINCT doctor_name, specialty FROM appointments")
-            return cursor.fetchall()
+        specialty = (specialty or "").strip()
+
+        def load():
+            with sqlite3.connect(self.clinic_db_path) as conn:
+                cursor = conn.cursor()
+                if specialty:
+                    cursor.execute(
+                        "SELECT doctor_name, specialty FROM doctors WHERE LOWER(specialty) LIKE LOWER(?)",
+                        (f"%{specialty}%",))
+                else:
+                    cursor.execute("SELECT doctor_name, specialty FROM doctors")
+                return cursor.fetchall()
+
+        key = ("doctors_by_specialty", specialty.lower())
+        return self.directory_cache.get(self.clinic_db_path, key, load)
 
     def get_all_clinics(self):
         """Get all distinct clinic names"""
-        with sqlite3.connect(self.clinic_db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT clinic_name FROM appointments")
-            return [row[0] for row in cursor.fetchall()]
+        def load():
+            with sqlite3.connect(self.clinic_db_path) as conn:
+                return [row[0] for row in conn.execute("SELECT clinic_name FROM clinics")]
+
+        return self.directory_cache.get(self.clinic_db_path, "clinics", load)
 
     def get_clinic_details(self):
         """Get all clinics with their doctors and specialties"""
-        with sqlite3.connect(self.clinic_db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT clinic_name, doctor_name, specialty 
-                FROM appointments
-                ORDER BY clinic_name, doctor_name
-            """)
-            return cursor.fetchall()
+        def load():
+            with sqlite3.connect(self.clinic_db_path) as conn:
+                return conn.execute("""
+                    SELECT c.clinic_name, d.doctor_name, d.specialty
+                    FROM doctors d JOIN clinics c ON c.clinic_id = d.clinic_id
+                    ORDER BY c.clinic_name, d.doctor_name
+                """).fetchall()
+
+        return self.directory_cache.get(self.clinic_db_path, "clinic_details", load)
+
+    def get_marketers(self):
+        """Get all marketing team members as (marketer_id, marketer_name)"""
+        def load():
+            with sqlite3.connect(self.cob_db_path) as conn:
+                return conn.execute("SELECT marketer_id, marketer_name FROM marketers ORDER BY marketer_name").fetchall()
 
-    def get_earliest_available_slots(self, specialty: str = None, doctor_name: str = None, limit: int = 3):
+        return self.directory_cache.get(self.cob_db_path, "marketers", load)
+
+    def resolve_doctor_ids(self, doctor_name: str) -> List[str]:
+        """doctor_ids whose name matches free text, tolerating titles and typos"""
+        def load():
+            with sqlite3.connect(self.clinic_db_path) as conn:
+                return NameIndex(conn.execute("SELECT doctor_id, doctor_name FROM doctors").fetchall())
+
+        return self.directory_cache.get(self.clinic_db_path, "doctor_name_index", load).resolve(doctor_name)
+
+    def resolve_marketer_ids(self, marketer_name: str) -> List[str]:
+        """marketer_ids whose name matches free text, tolerating titles and typos"""
+        def load():
+            return NameIndex(self.get_marketers())
+
+        return self.directory_cache.get(self.cob_db_path, "marketer_name_index", load).resolve(marketer_name)
+
+    def get_earliest_available_slots(self, specialty: str = None, doctor_name: str = None, limit: int = 3,
+                                     session_id: str = None):
         """Get earliest available slots for a specialty or doctor"""
+        doctor_ids = self.resolve_doctor_ids(doctor_name) if doctor_name else None
+        if doctor_ids == []:
+            return []
+        if self.templates:
+            return self.templates.earliest_clinic_slots(specialty, doctor_ids, limit, session_id=session_id)
+
         conn = self.get_clinic_connection()
         cursor = conn.cursor()
         
@@ -190,16 +527,21 @@ class DatabaseManager:
             SELECT clinic_name, doctor_name, specialty, slot_datetime
             FROM appointments
             WHERE available = 'True'
+            AND NOT EXISTS (
+                SELECT 1 FROM slot_holds h
+                WHERE h.resource_id = appointments.doctor_id AND h.slot_datetime = appointments.slot_datetime
+                AND h.expires_at > ? AND (? IS NULL OR h.session_id IS NOT ?)
+            )
         """
-        params = []
+        params = [time.time(), session_id, session_id]
         
         if specialty:
             query += " AND LOWER(specialty) LIKE LOWER(?)"
             params.append(f"%{specialty}%")
             
-        if doctor_name:
-            query += " AND LOWER(doctor_name) LIKE LOWER(?)"
-            params.append(f"%{doctor_name}%")
+        if doctor_ids:
+            query += f" AND doctor_id IN ({placeholders(doctor_ids)})"
+            params.extend(doctor_ids)
             
         query += " ORDER BY slot_datetime LIMIT ?"
         params.append(limit)
@@ -0,0 +1,157 @@
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Honorifics users type but names are not stored with
+TITLES = {"dr", "doctor", "prof", "mr", "mrs", "ms", "miss"}
+
+# Minimum per-token similarity (1 - edit distance / length) for a fuzzy match;
+# allows one typo in short names and two from six letters up
+MIN_SIMILARITY = 0.65
+
+# Fuzzy matches this close to the best score are returned together
+SCORE_MARGIN = 0.05
+
+# Share of a query token's trigrams a name token must have to be compared
+MIN_SHARED_TRIGRAMS = 0.3
+
+# Resolved queries remembered per index (the index is rebuilt, not updated)
+QUERY_CACHE_SIZE = 1024
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without titles: 'Dr. O'Neil' -> ['o', 'neil']"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in TITLES]
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Edit distance counting an adjacent transposition as one edit ("micheal" -> "michael")"""
+    rows = [list(range(len(b) + 1))]
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            row[j] = min(rows[i - 1][j] + 1, row[j - 1] + 1, rows[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], rows[i - 2][j - 2] + 1)
+        rows.append(row)
+    return rows[-1][-1]
+
+
+def similarity(a: str, b: str) -> float:
+    longest = max(len(a), len(b))
+    # The length difference alone bounds the distance from below
+    if 1 - abs(len(a) - len(b)) / longest < MIN_SIMILARITY:
+        return 0.0
+    return 1 - edit_distance(a, b) / longest
+
+
+class NameIndex:
+    """In-memory trigram index resolving free-text names to resource IDs
+
+    A query first matches names containing it (the old LIKE '%name%'
+    behaviour, minus case, punctuation and titles). If nothing contains it,
+    each query token is compared by edit distance with the distinct name
+    tokens sharing enough trigrams with it, and names matching every query
+    token are ranked by their worst token, so "Dr. Jonson" still finds
+    "Michael Johnson". Work is proportional to distinct tokens, not names.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.normalized: List[str] = []
+        self.token_positions: Dict[str, Set[int]] = defaultdict(set)
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self._results: Dict[str, List[Tuple[str, str, float]]] = {}
+        for resource_id, name in entries:
+            position = len(self.ids)
+            tokens = normalize_tokens(name or "")
+            self.ids.append(resource_id)
+            self.names.append(name)
+            self.normalized.append(" ".join(tokens))
+            for token in tokens:
+                self.token_positions[token].add(position)
+        for token in self.token_positions:
+            for gram in trigrams(token):
+                self.postings[gram].add(token)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, text: str) -> List[Tuple[str, str, float]]:
+        """(resource_id, name, score) matches for text, best first"""
+        query_tokens = normalize_tokens(text or "")
+        if not query_tokens:
+            return []
+        query = " ".join(query_tokens)
+        if query in self._results:
+            return self._results[query]
+
+        results = self._contained(query_tokens, query) or self._fuzzy(query_tokens)
+        if len(self._results) >= QUERY_CACHE_SIZE:
+            self._results.clear()
+        self._results[query] = results
+        return results
+
+    def _tokens_containing(self, token: str) -> Iterable[str]:
+        if len(token) < 3:
+            return [name_token for name_token in self.token_positions if token in name_token]
+        # Every inner trigram of a substring is an inner trigram of the containing token
+        inner = [token[i:i + 3] for i in range(len(token) - 2)]
+        candidates = set.intersection(*(self.postings.get(gram, set()) for gram in inner))
+        return [name_token for name_token in candidates if token in name_token]
+
+    def _contained(self, query_tokens: List[str], query: str) -> List[Tuple[str, str, float]]:
+        positions = None
+        for token in query_tokens:
+            matches = set()
+            for name_token in self._tokens_containing(token):
+                matches |= self.token_positions[name_token]
+            positions = matches if positions is None else positions & matches
+        return [
+            (self.ids[position], self.names[position], 1.0)
+            for position in sorted(positions) if query in self.normalized[position]
+        ]
+
+    def _fuzzy(self, query_tokens: List[str]) -> List[Tuple[str, str, float]]:
+        scores = None
+        for token in query_tokens:
+            grams = trigrams(token)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+
+            token_scores: Dict[int, float] = {}
+            for name_token, count in shared.items():
+                if count < MIN_SHARED_TRIGRAMS * len(grams):
+                    continue
+                score = similarity(token, name_token)
+                if score < MIN_SIMILARITY:
+                    continue
+                for position in self.token_positions[name_token]:
+                    token_scores[position] = max(token_scores.get(position, 0.0), score)
+
+            # A name must match every query token; it is as good as its worst match
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {position: min(score, token_scores[position])
+                          for position, score in scores.items() if position in token_scores}
+            if not scores:
+                return []
+
+        best = max(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            (self.ids[position], self.names[position], score)
+            for position, score in ranked if score >= best - SCORE_MARGIN
+        ]
+
+    def resolve(self, text: str) -> List[str]:
+        """Resource IDs matching text; empty when nothing is close enough"""
+        return [resource_id for resource_id, _, _ in self.search(text)]
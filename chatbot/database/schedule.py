@@ -0,0 +1,204 @@
+import sqlite3
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+# Slot tables: one row per bookable slot (the "slots" schedule backend)
+APPOINTMENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointments (
+    clinic_id TEXT,
+    doctor_id TEXT,
+    doctor_name TEXT,
+    specialty TEXT,
+    clinic_name TEXT,
+    slot_datetime DATETIME,
+    available BOOLEAN DEFAULT 1,
+    appointment_id TEXT,
+    patient_name TEXT,
+    contact_email TEXT,
+    PRIMARY KEY (clinic_id, doctor_id, slot_datetime)
+)
+"""
+
+MARKETING_AVAILABILITY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS marketing_availability (
+    marketer_id TEXT,
+    marketer_name TEXT,
+    slot_datetime DATETIME,
+    available BOOLEAN DEFAULT 1,
+    appointment_id TEXT,
+    customer_id TEXT,
+    PRIMARY KEY (marketer_id, slot_datetime)
+)
+"""
+
+# Secondary indexes these tables once had; the unique slot key covers the same columns
+SUPERSEDED_SLOT_INDEXES = ("idx_appointments_doctor_slot", "idx_marketing_slot")
+
+WORKING_HOURS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS working_hours (
+    resource_id TEXT,
+    weekday INTEGER,
+    start_time TEXT,
+    end_time TEXT,
+    slot_minutes INTEGER DEFAULT 60,
+    PRIMARY KEY (resource_id, weekday, start_time)
+)
+"""
+
+# Slot table columns that describe the resource rather than the slot
+RESOURCE_COLUMNS = {
+    "clinic": ("clinic_id", "doctor_id", "doctor_name", "specialty", "clinic_name"),
+    "marketing": ("marketer_id", "marketer_name")
+}
+
+# Directory rows of every resource with working hours: the resource id, then RESOURCE_COLUMNS
+RESOURCE_QUERIES = {
+    "clinic": """
+        SELECT d.doctor_id, d.clinic_id, d.doctor_id, d.doctor_name, d.specialty, c.clinic_name
+        FROM doctors d
+        JOIN clinics c ON c.clinic_id = d.clinic_id
+        WHERE d.doctor_id IN (SELECT resource_id FROM working_hours)
+    """,
+    "marketing": """
+        SELECT marketer_id, marketer_id, marketer_name
+        FROM marketers
+        WHERE marketer_id IN (SELECT resource_id FROM working_hours)
+    """
+}
+
+
+def unique_slot_index(table: str, id_column: str) -> str:
+    """DDL of the unique (resource, slot_datetime) index, which also serves slot lookups"""
+    return f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_unique_slot ON {table} ({id_column}, slot_datetime)"
+
+
+def unique_keys(conn: sqlite3.Connection, table: str) -> Dict[str, List[str]]:
+    """Columns of each unique index on table (the primary key included)"""
+    return {
+        name: [column for _, _, column in conn.execute(f"PRAGMA index_info({name})")]
+        for _, name, unique, *_ in conn.execute(f"PRAGMA index_list({table})") if unique
+    }
+
+
+def ensure_unique_slots(conn: sqlite3.Connection, table: str, id_column: str):
+    """Drop duplicate (resource, slot_datetime) rows and enforce uniqueness with an index
+
+    Tables written by DataFrame.to_sql have no primary key, so INSERT OR
+    IGNORE would silently duplicate slots. A booked row wins over open copies.
+    A primary key on exactly these columns already enforces this, so no
+    second copy of it is built.
+    """
+    for name in SUPERSEDED_SLOT_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    index = f"idx_{table}_unique_slot"
+    keys = unique_keys(conn, table)
+    if any(columns == [id_column, "slot_datetime"] for name, columns in keys.items() if name != index):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+        return
+    if index in keys:
+        return
+    conn.execute(f"""
+        DELETE FROM {table} WHERE rowid IN (
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (
+                    PARTITION BY {id_column}, slot_datetime ORDER BY available = 'False' DESC, rowid
+                ) AS copy
+                FROM {table}
+            ) WHERE copy > 1
+        )
+    """)
+    conn.execute(unique_slot_index(table, id_column))
+
+
+class ScheduleMaterializer:
+    """Appends future slots from weekly working-hour templates
+
+    working_hours holds one row per resource, weekday (0 = Monday) and
+    shift; end_time is exclusive. Resources and their details come from the
+    directory tables, so a resource without any slot rows yet starts today.
+    Each run only generates the days after a resource's last materialized
+    slot, up to horizon_days ahead, and inserts
+    them with INSERT OR IGNORE on the slot primary key. Re-running is
+    harmless and existing rows (including bookings) are never modified.
+    """
+
+    def __init__(self, db_manager, horizon_days: int = 30):
+        self.db_manager = db_manager
+        self.horizon_days = horizon_days
+
+    def bootstrap_templates(self, kind: str) -> int:
+        """Infer templates from existing slots when none are defined yet (one-off full scan)"""
+        db_path, table, id_column = self.db_manager._hold_target(kind)
+        with sqlite3.connect(db_path) as conn:
+            if conn.execute("SELECT 1 FROM working_hours LIMIT 1").fetchone():
+                return 0
+            cursor = conn.execute(f"""
+                INSERT OR IGNORE INTO working_hours (resource_id, weekday, start_time, end_time, slot_minutes)
+                SELECT {id_column},
+                       (CAST(strftime('%w', slot_datetime) AS INTEGER) + 6) % 7,
+                       MIN(TIME(slot_datetime)),
+                       TIME(MAX(TIME(slot_datetime)), '+60 minutes'),
+                       60
+                FROM {table}
+                GROUP BY 1, 2
+            """)
+            return cursor.rowcount
+
+    def materialize(self, kind: str, today: Optional[date] = None) -> int:
+        """Insert missing slots from today up to the horizon; returns rows added"""
+        if self.db_manager.templates:
+            return 0  # the template backend derives slots on the fly
+
+        db_path, table, id_column = self.db_manager._hold_target(kind)
+        today = today or date.today()
+        horizon_end = today + timedelta(days=self.horizon_days)
+        resource_columns = RESOURCE_COLUMNS[kind]
+
+        with sqlite3.connect(db_path) as conn:
+            templates = defaultdict(lambda: defaultdict(list))
+            for resource_id, weekday, start_time, end_time, slot_minutes in conn.execute(
+                "SELECT resource_id, weekday, start_time, end_time, slot_minutes FROM working_hours"
+            ):
+                templates[resource_id][weekday].append((start_time, end_time, slot_minutes or 60))
+
+            rows = []
+            for resource_id, *resource in conn.execute(RESOURCE_QUERIES[kind]).fetchall():
+                shifts = templates[resource_id]
+                # Latest slot via the (resource, slot_datetime) index is the resume point
+                latest = conn.execute(
+                    f"SELECT MAX(slot_datetime) FROM {table} WHERE {id_column} = ?",
+                    (resource_id,)
+                ).fetchone()[0]
+
+                # The last materialized day may be partial; resume strictly after its last slot
+                latest_slot = latest or ""
+                day = max(today, date.fromisoformat(latest[:10])) if latest else today
+                while day < horizon_end:
+                    for start_time, end_time, slot_minutes in shifts.get(day.weekday(), ()):
+                        slot = datetime.strptime(f"{day} {start_time}", "%Y-%m-%d %H:%M:%S")
+                        stop = datetime.strptime(f"{day} {end_time}", "%Y-%m-%d %H:%M:%S")
+                        while slot < stop:
+                            slot_datetime = slot.strftime("%Y-%m-%d %H:%M:%S")
+                            if slot_datetime > latest_slot:
+                                rows.append((*resource, slot_datetime, 'True'))
+                            slot += timedelta(minutes=slot_minutes)
+                    day += timedelta(days=1)
+
+            columns = (*resource_columns, "slot_datetime", "available")
+            # The unique (resource, slot_datetime) index still guards against concurrent runs;
+            # rowcount, unlike total_changes, excludes rows written by change-log triggers
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                rows
+            )
+            return max(cursor.rowcount, 0)
+
+    def materialize_all(self, today: Optional[date] = None) -> Dict[str, int]:
+        """Bootstrap templates if needed and materialize both schedules"""
+        added = {}
+        for kind in RESOURCE_COLUMNS:
+            self.bootstrap_templates(kind)
+            added[kind] = self.materialize(kind, today)
+        return added
@@ -0,0 +1,254 @@
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .schedule import ScheduleMaterializer
+
+# Bookings and blocked-off time; a row with no appointment_id is a block (leave, holiday)
+SLOT_EXCEPTIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slot_exceptions (
+    resource_id TEXT,
+    slot_datetime DATETIME,
+    appointment_id TEXT,
+    patient_name TEXT,
+    contact_email TEXT,
+    customer_id TEXT,
+    PRIMARY KEY (resource_id, slot_datetime)
+)
+"""
+
+SLOT_EXCEPTIONS_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_slot_exceptions_slot ON slot_exceptions (slot_datetime)
+"""
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# How far ahead get_earliest_available_slots looks before giving up
+SEARCH_HORIZON_DAYS = 90
+
+
+def parse_day(value: str) -> date:
+    """Date part of 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'"""
+    return date.fromisoformat(value.strip()[:10])
+
+
+def shift_slots(day: date, start_time: str, end_time: str, slot_minutes: int) -> Iterable[str]:
+    """slot_datetime strings of one shift; end_time is exclusive"""
+    slot = datetime.strptime(f"{day} {start_time}", DATETIME_FORMAT)
+    stop = datetime.strptime(f"{day} {end_time}", DATETIME_FORMAT)
+    step = timedelta(minutes=slot_minutes or 60)
+    while slot < stop:
+        yield slot.strftime(DATETIME_FORMAT)
+        slot += step
+
+
+def in_window(slot_datetime: str, start_time: Optional[str], end_time: Optional[str]) -> bool:
+    """Same inclusive time-of-day filter as the slot-table queries"""
+    slot_time = slot_datetime[11:]
+    if start_time and slot_time < start_time:
+        return False
+    if end_time and slot_time > end_time:
+        return False
+    return True
+
+
+class TemplateSchedule:
+    """Availability computed from weekly templates minus sparse exceptions
+
+    Storage is working_hours (one row per resource, weekday and shift), the
+    directory tables, and slot_exceptions holding only booked or blocked
+    slots, so it grows with bookings instead of horizon x staff. A slot is
+    open when a template shift produces it and it has neither an exception
+    nor an unexpired hold.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    # ---- reads ----
+
+    def _taken(self, conn: sqlite3.Connection, day: date, session_id: str = None) -> Set[Tuple[str, str]]:
+        """(resource_id, slot_datetime) of exceptions and unexpired holds on day (except session_id's)"""
+        bounds = (f"{day} 00:00:00", f"{day + timedelta(days=1)} 00:00:00")
+        taken = set(conn.execute(
+            "SELECT resource_id, slot_datetime FROM slot_exceptions WHERE slot_datetime >= ? AND slot_datetime < ?",
+            bounds
+        ))
+        taken.update(conn.execute(
+            "SELECT resource_id, slot_datetime FROM slot_holds "
+            "WHERE slot_datetime >= ? AND slot_datetime < ? AND expires_at > ? "
+            "AND (? IS NULL OR session_id IS NOT ?)",
+            (*bounds, time.time(), session_id, session_id)
+        ))
+        return taken
+
+    def clinic_slots(self, day: date, specialty: str = None, doctor_ids: List[str] = None,
+                     start_time: str = None, end_time: str = None, session_id: str = None) -> List[tuple]:
+        """Rows shaped like get_available_clinic_slots; names are resolved to doctor_ids by the caller"""
+        query = """
+        SELECT c.clinic_name, d.doctor_name, d.specialty, d.clinic_id, d.doctor_id,
+               w.start_time, w.end_time, w.slot_minutes
+        FROM working_hours w
+        JOIN doctors d ON d.doctor_id = w.resource_id
+        JOIN clinics c ON c.clinic_id = d.clinic_id
+        WHERE w.weekday = ?
+        """
+        params = [day.weekday()]
+        if specialty:
+            query += " AND LOWER(d.specialty) LIKE LOWER(?)"
+            params.append(f"%{specialty}%")
+        if doctor_ids:
+            query += f" AND d.doctor_id IN ({', '.join('?' for _ in doctor_ids)})"
+            params.extend(doctor_ids)
+
+        with sqlite3.connect(self.db_manager.clinic_db_path) as conn:
+            taken = self._taken(conn, day, session_id)
+            rows = []
+            for clinic_name, name, doctor_specialty, clinic_id, doctor_id, shift_start, shift_end, minutes in conn.execute(query, params):
+                for slot in shift_slots(day, shift_start, shift_end, minutes):
+                    if (doctor_id, slot) not in taken and in_window(slot, start_time, end_time):
+                        rows.append((clinic_name, name, doctor_specialty, slot, clinic_id, doctor_id))
+        rows.sort(key=lambda row: row[3])
+        return rows
+
+    def marketing_slots(self, day: date, marketer_ids: List[str] = None,
+                        start_time: str = None, end_time: str = None, session_id: str = None) -> List[tuple]:
+        """Rows shaped like get_available_marketing_slots"""
+        query = """
+        SELECT m.marketer_name, m.marketer_id, w.start_time, w.end_time, w.slot_minutes
+        FROM working_hours w
+        JOIN marketers m ON m.marketer_id = w.resource_id
+        WHERE w.weekday = ?
+        """
+        params = [day.weekday()]
+        if marketer_ids:
+            query += f" AND m.marketer_id IN ({', '.join('?' for _ in marketer_ids)})"
+            params.extend(marketer_ids)
+
+        with sqlite3.connect(self.db_manager.cob_db_path) as conn:
+            taken = self._taken(conn, day, session_id)
+            rows = []
+            for name, marketer_id, shift_start, shift_end, minutes in conn.execute(query, params):
+                for slot in shift_slots(day, shift_start, shift_end, minutes):
+                    if (marketer_id, slot) not in taken and in_window(slot, start_time, end_time):
+                        rows.append((name, slot, marketer_id))
+        rows.sort(key=lambda row: row[1])
+        return rows
+
+    def earliest_clinic_slots(self, specialty: str = None, doctor_ids: List[str] = None,
+                              limit: int = 3, today: Optional[date] = None, session_id: str = None) -> List[tuple]:
+        """Rows shaped like get_earliest_available_slots, searching day by day"""
+        day = today or date.today()
+        found = []
+        for _ in range(SEARCH_HORIZON_DAYS):
+            for row in self.clinic_slots(day, specialty, doctor_ids, session_id=session_id):
+                found.append(row[:4])
+                if len(found) == limit:
+                    return found
+            day += timedelta(days=1)
+        return found
+
+    # ---- writes (called inside a BEGIN IMMEDIATE transaction) ----
+
+    def open_slots(self, conn: sqlite3.Connection, slots: Iterable[Tuple[str, str]],
+                   ignore_holds: bool = False) -> Set[Tuple[str, str]]:
+        """Subset of (resource_id, slot_datetime) pairs that are currently bookable"""
+        slots = set(slots)
+        if not slots:
+            return set()
+
+        resources = sorted({resource_id for resource_id, _ in slots})
+        placeholders = ", ".join("?" for _ in resources)
+        shifts = defaultdict(list)
+        for resource_id, weekday, start_time, end_time, minutes in conn.execute(
+            "SELECT resource_id, weekday, start_time, end_time, slot_minutes FROM working_hours "
+            f"WHERE resource_id IN ({placeholders})",
+            resources
+        ):
+            shifts[(resource_id, weekday)].append((start_time, end_time, minutes or 60))
+
+        open_slots = set()
+        for resource_id, slot_datetime in slots:
+            slot = datetime.strptime(slot_datetime, DATETIME_FORMAT)
+            for start_time, end_time, minutes in shifts.get((resource_id, slot.weekday()), ()):
+                start = datetime.strptime(f"{slot.date()} {start_time}", DATETIME_FORMAT)
+                stop = datetime.strptime(f"{slot.date()} {end_time}", DATETIME_FORMAT)
+                offset = (slot - start).total_seconds()
+                if start <= slot < stop and offset % (minutes * 60) == 0:
+                    open_slots.add((resource_id, slot_datetime))
+                    break
+        if not open_slots:
+            return open_slots
+
+        values = ", ".join("(?, ?)" for _ in open_slots)
+        pairs = [value for slot in open_slots for value in slot]
+        open_slots -= set(conn.execute(
+            f"SELECT resource_id, slot_datetime FROM slot_exceptions WHERE (resource_id, slot_datetime) IN (VALUES {values})",
+            pairs
+        ))
+        if not ignore_holds:
+            open_slots -= set(conn.execute(
+                "SELECT resource_id, slot_datetime FROM slot_holds "
+                f"WHERE (resource_id, slot_datetime) IN (VALUES {values}) AND expires_at > ?",
+                (*pairs, time.time())
+            ))
+        return open_slots
+
+    def claim(self, conn: sqlite3.Connection, bookings: List[Tuple[str, str, Dict[str, str]]]) -> int:
+        """Record (resource_id, slot_datetime, assignments) bookings as exceptions
+
+        Callers validate with open_slots in the same transaction first.
+        """
+        if not bookings:
+            return 0
+        columns = ("resource_id", "slot_datetime", *bookings[0][2])
+        conn.executemany(
+            f"INSERT INTO slot_exceptions ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [(resource_id, slot_datetime, *assignments.values()) for resource_id, slot_datetime, assignments in bookings]
+        )
+        return len(bookings)
+
+    def resolve_resources(self, conn: sqlite3.Connection, kind: str, match: Dict[str, str]) -> List[str]:
+        """Resource IDs for a booking match given by ID or by exact name"""
+        if kind == "clinic":
+            if match.get("doctor_id"):
+                return [match["doctor_id"]]
+            query = "SELECT doctor_id FROM doctors WHERE doctor_name = ?"
+            name = match.get("doctor_name")
+        else:
+            if match.get("marketer_id"):
+                return [match["marketer_id"]]
+            query = "SELECT marketer_id FROM marketers WHERE marketer_name = ?"
+            name = match.get("marketer_name")
+        return [row[0] for row in conn.execute(query, (name,))]
+
+    # ---- migration from one-row-per-slot tables ----
+
+    def migrate_from_slots(self) -> Dict[str, int]:
+        """Fill templates and exceptions from the slot tables (idempotent)
+
+        The directory tables are migrated by DatabaseManager on startup.
+        Returns the number of exception rows copied per kind.
+        """
+        copied = {}
+        with sqlite3.connect(self.db_manager.clinic_db_path) as conn:
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO slot_exceptions (resource_id, slot_datetime, appointment_id, patient_name, contact_email)
+                SELECT doctor_id, slot_datetime, appointment_id, patient_name, contact_email
+                FROM appointments WHERE available = 'False'
+            """)
+            copied["clinic"] = cursor.rowcount
+        with sqlite3.connect(self.db_manager.cob_db_path) as conn:
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO slot_exceptions (resource_id, slot_datetime, appointment_id, customer_id)
+                SELECT marketer_id, slot_datetime, appointment_id, customer_id
+                FROM marketing_availability WHERE available = 'False'
+            """)
+            copied["marketing"] = cursor.rowcount
+
+        # Templates are inferred from the slots just like for the materializer
+        materializer = ScheduleMaterializer(self.db_manager)
+        for kind in copied:
+            materializer.bootstrap_templates(kind)
+        return copied
@@ -0,0 +1,134 @@
+import os
+import re
+import time
+import random
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+from tqdm import tqdm
+from langchain_core.embeddings import Embeddings
+
+# Error classes worth retrying, matched by name anywhere in the MRO so the client
+# libraries (google.api_core, openai, httpx, requests) need not be importable
+TRANSIENT_ERROR_TYPES = {
+    "ResourceExhausted", "TooManyRequests", "RateLimitError", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "APIConnectionError", "APITimeoutError",
+    "ConnectionError", "TimeoutError", "ConnectError", "ConnectTimeout", "ReadTimeout"
+}
+
+# Last resort for errors that only carry a message: phrases, and status codes only right after
+# "HTTP" or "status" so unrelated numbers (token counts, batch sizes) never look like a 5xx
+TRANSIENT_MESSAGE = re.compile(
+    r"\b(?:(?:http(?:/\d(?:\.\d)?)?|status(?: code)?)[ :=]*(?:429|5\d\d)|"
+    r"rate[ -]limit(?:ed)?|too many requests|quota|resource exhausted|"
+    r"timed out|timeout|deadline exceeded|(?:service|temporarily) unavailable)\b"
+)
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP status carried by an API error, if any (code, status_code or response.status_code)"""
+    for value in (getattr(error, "status_code", None), getattr(error, "code", None),
+                  getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(value, int) and 100 <= value < 600:
+            return int(value)
+    return None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an embedding failure is likely to succeed when retried"""
+    if any(cls.__name__ in TRANSIENT_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    status = status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return bool(TRANSIENT_MESSAGE.search(str(error).lower()))
+
+
+class BatchEmbedder:
+    """Embeds large document sets in batches across a bounded worker pool
+
+    Each batch is retried with jittered exponential backoff on transient
+    errors. With a checkpoint directory, finished batches are saved as they
+    complete (keyed by their content), so an interrupted build resumes
+    without re-embedding what was already done.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = 100, max_workers: int = 4,
+                 max_retries: int = 5, backoff: float = 1.0, checkpoint_dir: Optional[str] = None,
+                 show_progress: bool = True):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint_dir = checkpoint_dir
+        self.show_progress = show_progress
+
+    def _checkpoint_path(self, batch: List[str]) -> Optional[str]:
+        if not self.checkpoint_dir:
+            return None
+        digest = hashlib.sha256()
+        # Vectors from different embedding models must never be mixed
+        digest.update(repr((
+            type(self.embeddings).__name__,
+            getattr(self.embeddings, "model", None),
+            getattr(self.embeddings, "dimensions", None)
+        )).encode("utf-8"))
+        for text in batch:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        return os.path.join(self.checkpoint_dir, f"{digest.hexdigest()[:24]}.npy")
+
+    def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return np.asarray(self.embeddings.embed_documents(batch), dtype=np.float32)
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient_error(e):
+                    raise
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, returning a float32 matrix in input order"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results: List[Optional[np.ndarray]] = [None] * len(batches)
+        paths = [self._checkpoint_path(batch) for batch in batches]
+
+        # Resume from batches finished by an earlier, interrupted build
+        for i, path in enumerate(paths):
+            if path and os.path.exists(path):
+                results[i] = np.load(path)
+
+        todo = [i for i, result in enumerate(results) if result is None]
+        if todo:
+            if self.checkpoint_dir:
+                os.makedirs(self.checkpoint_dir, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._embed_batch, batches[i]): i for i in todo}
+                progress = tqdm(
+                    as_completed(futures),
+                    total=len(batches),
+                    initial=len(batches) - len(todo),
+                    desc="Embedding",
+                    unit="batch",
+                    disable=not self.show_progress or len(batches) < 2
+                )
+                for future in progress:
+                    i = futures[future]
+                    results[i] = future.result()
+                    if paths[i]:
+                        tmp_path = f"{paths[i]}.tmp-{os.getpid()}.npy"
+                        np.save(tmp_path, results[i])
+                        os.replace(tmp_path, paths[i])
+
+        # The build is complete, checkpoints are no longer needed
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+        if not results:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(results)
@@ -0,0 +1,102 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different phrasings share a cache key"""
+    # Lowercase, drop punctuation (keeping symbols that carry meaning such as
+    # prices, emails and phone numbers) and collapse whitespace
+    cleaned = re.sub(r"[^\w\s$@.\-/]", " ", question.lower())
+    return " ".join(cleaned.split()).strip(" .")
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with optional per-entry TTL"""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value under key, evicting least recently used entries"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class AnswerCache:
+    """Cache of generated answers keyed by normalized question and KB version
+
+    Entries written against an older knowledge base version are never served:
+    the version is part of the key, and the whole cache is dropped the first
+    time a new version is seen so stale answers do not hold memory.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: Optional[float] = None):
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+        self._version: Optional[str] = None
+
+    def _check_version(self, version: str):
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+
+    def get(self, question: str, version: str) -> Optional[str]:
+        self._check_version(version)
+        return self._cache.get((normalize_question(question), version))
+
+    def set(self, question: str, version: str, answer: str, ttl: Optional[float] = None):
+        self._check_version(version)
+        self._cache.set((normalize_question(question), version), answer, ttl=ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "version": self._version}
@@ -0,0 +1,75 @@
+import os
+import re
+import zlib
+import numpy as np
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+
+# Embedding backends selectable through KB_EMBEDDING_PROVIDER
+GOOGLE_PROVIDER = "google"
+LOCAL_PROVIDER = "local"
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline CPU embeddings using a signed feature-hashing vectorizer
+
+    Words, word bigrams and character trigrams are hashed with CRC32 (stable
+    across processes, unlike hash()) into a fixed number of dimensions, then
+    log-scaled and L2-normalized so inner product equals cosine similarity.
+    """
+
+    def __init__(self, dimensions: int = 512, char_ngrams: int = 3):
+        self.dimensions = dimensions
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        n = self.char_ngrams
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(f.encode("utf-8")) for f in self._features(text)),
+                dtype=np.uint32
+            )
+            if not hashes.size:
+                continue
+            columns = hashes % self.dimensions
+            # Top bit picks the sign so collisions tend to cancel out
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], columns, signs)
+
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+def get_embeddings(provider: Optional[str] = None, google_api_key: Optional[str] = None) -> Embeddings:
+    """Build the embedding backend selected by argument or KB_EMBEDDING_PROVIDER"""
+    provider = (provider or os.getenv("KB_EMBEDDING_PROVIDER", GOOGLE_PROVIDER)).lower()
+
+    if provider == LOCAL_PROVIDER:
+        return HashingEmbeddings(dimensions=int(os.getenv("KB_EMBEDDING_DIM", "512")))
+
+    if provider == GOOGLE_PROVIDER:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        google_api_key = google_api_key or os.getenv("GOOGLE_API_KEY")
+        if not google_api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        return GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=google_api_key)
+
+    raise ValueError(f"Unknown embedding provider: {provider}")
@@ -0,0 +1,90 @@
+import os
+import math
+import faiss
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+
+# Supported index layouts, from exact to most compressed
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+@dataclass
+class IndexConfig:
+    """FAISS index layout and search-time tuning"""
+    index_type: str = "flat"
+    nlist: Optional[int] = None      # IVF cells; defaults to ~4*sqrt(n), at most n/39
+    nprobe: int = 8                  # IVF cells visited per query
+    pq_m: int = 16                   # PQ sub-quantizers (must divide the dimension)
+    pq_bits: int = 8                 # bits per PQ code
+    hnsw_m: int = 32                 # HNSW graph degree
+    ef_construction: int = 80
+    ef_search: int = 64
+    train_size: int = 50000          # vectors sampled to train IVF/PQ
+    min_train_points: int = 1000     # below this, approximate indexes fall back to flat
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        """Read the index configuration from KB_INDEX_* environment variables"""
+        nlist = os.getenv("KB_INDEX_NLIST")
+        return cls(
+            index_type=os.getenv("KB_INDEX_TYPE", "flat").lower(),
+            nlist=int(nlist) if nlist else None,
+            nprobe=int(os.getenv("KB_INDEX_NPROBE", "8")),
+            pq_m=int(os.getenv("KB_INDEX_PQ_M", "16")),
+            hnsw_m=int(os.getenv("KB_INDEX_HNSW_M", "32")),
+            ef_search=int(os.getenv("KB_INDEX_EF_SEARCH", "64"))
+        )
+
+    def factory_string(self, num_vectors: int) -> str:
+        """faiss.index_factory description for this configuration"""
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {self.index_type}")
+
+        # FAISS wants at least 39 training points per centroid
+        nlist = self.nlist or max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+        if self.index_type == "ivf_flat":
+            return f"IVF{nlist},Flat"
+        if self.index_type == "ivf_pq":
+            return f"IVF{nlist},PQ{self.pq_m}x{self.pq_bits}"
+        if self.index_type == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+        return "Flat"
+
+
+def set_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Tune recall vs latency of an existing index"""
+    if nprobe is not None:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = nprobe
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def build_index(vectors: np.ndarray, config: IndexConfig, seed: int = 1234) -> faiss.Index:
+    """Build, train and fill a FAISS index for the given vectors"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    num_vectors, dimension = vectors.shape
+
+    index_type = config.index_type
+    if index_type != "flat" and num_vectors < config.min_train_points:
+        # Too few vectors to train quantizers; exact search is cheap anyway
+        index_type = "flat"
+
+    factory = IndexConfig(**{**config.__dict__, "index_type": index_type}).factory_string(num_vectors)
+    index = faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = config.ef_construction
+
+    if not index.is_trained:
+        sample = vectors
+        if num_vectors > config.train_size:
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(num_vectors, config.train_size, replace=False)]
+        index.train(sample)
+
+    index.add(vectors)
+    set_search_params(index, nprobe=config.nprobe, ef_search=config.ef_search)
+    return index
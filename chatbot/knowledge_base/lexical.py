@@ -0,0 +1,120 @@
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from langchain.schema import Document
+
+# Words that carry no retrieval signal in customer questions
+STOPWORDS = {
+    "a", "an", "and", "are", "about", "at", "be", "can", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "tell",
+    "the", "there", "to", "what", "whats", "when", "where", "which", "who", "with",
+    "you", "your", "we", "our"
+}
+
+# Reciprocal rank fusion constant from Cormack et al.
+RRF_K = 60
+
+
+def extract_terms(text: str) -> List[str]:
+    """Lowercased search terms of a question, without stopwords"""
+    terms = [t for t in re.findall(r"\w+", text.lower()) if t not in STOPWORDS]
+    # Keep first occurrence order, drop duplicates
+    return list(dict.fromkeys(terms))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int) -> List[Document]:
+    """Fuse several ranked document lists into one using reciprocal rank fusion"""
+    scores: Dict[Tuple[str, str], float] = {}
+    docs: Dict[Tuple[str, str], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = (doc.metadata.get("source", ""), doc.page_content)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered[:k]]
+
+
+class LexicalIndex:
+    """In-memory SQLite FTS5 index over knowledge base chunks and product rows"""
+
+    def __init__(self):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("""
+            CREATE VIRTUAL TABLE chunks USING fts5(
+                content,
+                source UNINDEXED,
+                partition UNINDEXED,
+                tokenize = 'unicode61'
+            )
+        """)
+        self._docs: List[Document] = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add_documents(self, docs: List[Document]):
+        """Index knowledge base chunks"""
+        with self._lock:
+            start = len(self._docs)
+            self._docs.extend(docs)
+            self._conn.executemany(
+                "INSERT INTO chunks (rowid, content, source, partition) VALUES (?, ?, ?, ?)",
+                [
+                    (start + i, doc.page_content, doc.metadata.get("source", ""), doc.metadata.get("partition", ""))
+                    for i, doc in enumerate(docs)
+                ]
+            )
+            self._conn.commit()
+
+    def add_products(self, db_path: str):
+        """Index rows of the products table in the COB database"""
+        try:
+            with sqlite3.connect(db_path) as conn:
+                rows = conn.execute(
+                    "SELECT product_id, product_name, description, category FROM products"
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not index products from {db_path}: {e}")
+            return
+
+        self.add_documents([
+            Document(
+                page_content=f"{name}: {description} (Category: {category})",
+                metadata={"source": f"{db_path}:products", "partition": "products", "product_id": product_id}
+            )
+            for product_id, name, description, category in rows
+        ])
+
+    def search(self, question: str, k: int = 4, match_all: bool = False,
+               partitions: Optional[Sequence[str]] = None) -> List[Document]:
+        """BM25-ranked chunks matching any (or, with match_all, every) query term"""
+        terms = extract_terms(question)
+        if not terms:
+            return []
+
+        operator = " AND " if match_all else " OR "
+        query = "SELECT rowid FROM chunks WHERE chunks MATCH ?"
+        params = [operator.join(f'"{term}"' for term in terms)]
+        if partitions:
+            query += f" AND partition IN ({', '.join('?' * len(partitions))})"
+            params.extend(partitions)
+        query += " ORDER BY bm25(chunks) LIMIT ?"
+        params.append(k)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._docs[rowid] for (rowid,) in rows]
+
+    def confident_search(self, question: str, k: int = 4, min_terms: int = 2,
+                         partitions: Optional[Sequence[str]] = None) -> List[Document]:
+        """Chunks matching every term of a specific question, or [] if not confident
+
+        A multi-term question whose terms all occur in some chunk is precise
+        enough to answer lexically without an embedding round trip.
+        """
+        if len(extract_terms(question)) < min_terms:
+            return []
+        return self.search(question, k, match_all=True, partitions=partitions)
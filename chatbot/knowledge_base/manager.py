@@ -1,25 +1,124 @@
 import os
+import hashlib
+import threading
+import numpy as np
+from dataclasses import dataclass
 from dotenv import load_dotenv
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from langchain.schema import Document
+from .cache import LRUCache, normalize_question
+from .lexical import LexicalIndex, extract_terms, reciprocal_rank_fusion
+from .embeddings import get_embeddings
+from .index_factory import IndexConfig, build_index, set_search_params
+from .store import load_index, persist_index
+from .batch_embedder import BatchEmbedder
 
 load_dotenv()
 
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """One immutable version of the indexed knowledge base"""
+    version: str
+    vector_stores: Dict[str, FAISS]     # one sub-index per source partition
+    lexical_index: Optional[LexicalIndex]
+
+
+def partition_of(doc: Document) -> str:
+    """Partition tag of a chunk: explicit category metadata, else its file name"""
+    category = doc.metadata.get("category")
+    if category:
+        return str(category).lower()
+    source = doc.metadata.get("source", "")
+    return os.path.splitext(os.path.basename(source))[0].lower() or "default"
+
+
 # Knowledge Base Manager with RAG
 class KnowledgeBaseManager:
-    def __init__(self, path: str):
+    def __init__(self, path: str, retrieval_cache_size: int = 1024,
+                 cob_db_path: Optional[str] = None, lexical_fast_path: bool = True,
+                 embedding_provider: Optional[str] = None, index_config: Optional[IndexConfig] = None,
+                 index_dir: Optional[str] = None):
         self.path = path
-        self.google_api_key = os.getenv("GOOGLE_API_KEY")
-        if not self.google_api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        self.vector_store = self._init_vector_store()
+        # Products table to index lexically alongside the KB files
+        self.cob_db_path = cob_db_path
+        self.lexical_fast_path = lexical_fast_path
+        # "google" (default) or "local"; falls back to KB_EMBEDDING_PROVIDER
+        self.embeddings = get_embeddings(embedding_provider)
+        # Flat by default; IVF-Flat / IVF-PQ / HNSW via KB_INDEX_TYPE
+        self.index_config = index_config or IndexConfig.from_env()
+        # Persisted, memory-mapped index shared by every process on the host
+        self.index_dir = index_dir or os.getenv("KB_INDEX_DIR")
+        # Index builds embed in parallel batches, checkpointed next to the index
+        self.batch_embedder = BatchEmbedder(
+            self.embeddings,
+            batch_size=int(os.getenv("KB_EMBED_BATCH_SIZE", "100")),
+            max_workers=int(os.getenv("KB_EMBED_WORKERS", "4")),
+            checkpoint_dir=os.path.join(self.index_dir, "checkpoints") if self.index_dir else None
+        )
+        # Query embeddings keyed by normalized query (independent of KB content),
+        # top-k results keyed by normalized query, k and KB version
+        self._embedding_cache = LRUCache(max_size=retrieval_cache_size)
+        self._result_cache = LRUCache(max_size=retrieval_cache_size)
+        self._reload_lock = threading.Lock()
+        # Queries read this reference once, so a reload swaps it atomically
+        # while in-flight queries finish on the snapshot they started with
+        self._snapshot = self._build_snapshot()
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    @property
+    def vector_stores(self) -> Dict[str, FAISS]:
+        return self._snapshot.vector_stores
+
+    @property
+    def partitions(self) -> List[str]:
+        """Source partitions that can be passed as query(source=...)"""
+        return sorted(self._snapshot.vector_stores)
+
+    @property
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        return self._snapshot.lexical_index
+
+    def reindex(self) -> str:
+        """Rebuild the index from the knowledge base files and swap it in"""
+        with self._reload_lock:
+            snapshot = self._build_snapshot()
+            if snapshot.version != self._snapshot.version:
+                self._snapshot = snapshot
+                self._result_cache.clear()
+        return self.version
+
+    def clear_retrieval_cache(self):
+        self._embedding_cache.clear()
+        self._result_cache.clear()
 
-    def _init_vector_store(self):
-        """Initialize FAISS vector store from knowledge base documents"""
+    def retrieval_cache_stats(self) -> dict:
+        return {
+            "embeddings": self._embedding_cache.stats(),
+            "results": self._result_cache.stats()
+        }
+
+    @staticmethod
+    def _compute_version(docs: List[Document]) -> str:
+        """Content hash identifying the indexed knowledge base"""
+        digest = hashlib.sha256()
+        for doc in sorted(docs, key=lambda d: d.metadata.get("source", "")):
+            digest.update(doc.metadata.get("source", "").encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(doc.page_content.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
+
+    def _build_snapshot(self) -> KnowledgeSnapshot:
+        """Load knowledge base documents and build the vector and lexical indexes"""
         if not os.path.exists(self.path):
             os.makedirs(self.path)
             # Create sample knowledge files
@@ -32,17 +131,83 @@ class KnowledgeBaseManager:
             show_progress=False
         )
         docs = loader.load()
-
-        if not docs:
-            return None
+        version = self._compute_version(docs)
 
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
-        documents = text_splitter.split_documents(docs)
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=self.google_api_key)
-        return FAISS.from_documents(documents, embeddings)
+        documents = text_splitter.split_documents(docs) if docs else []
+
+        # Tag chunks with their partition and index each partition separately
+        grouped: Dict[str, List[Document]] = {}
+        for doc in documents:
+            doc.metadata["partition"] = partition_of(doc)
+            grouped.setdefault(doc.metadata["partition"], []).append(doc)
+        lexical_index = self._build_lexical_index(documents)
+
+        vector_stores = {}
+        for partition, partition_docs in grouped.items():
+            if self.index_dir:
+                vector_stores[partition] = self._load_or_build_vector_store(partition_docs, version, partition)
+            else:
+                vector_stores[partition] = self._build_vector_store(partition_docs)
+        return KnowledgeSnapshot(version, vector_stores, lexical_index)
+
+    def _store_key(self, version: str) -> str:
+        """Directory name of the persisted index for this content and configuration"""
+        config = self.index_config
+        settings = (
+            type(self.embeddings).__name__,
+            getattr(self.embeddings, "model", None),
+            getattr(self.embeddings, "dimensions", None),
+            config.index_type, config.nlist, config.pq_m, config.pq_bits, config.hnsw_m
+        )
+        return f"{version}-{hashlib.sha256(repr(settings).encode('utf-8')).hexdigest()[:8]}"
+
+    def _load_or_build_vector_store(self, documents: List[Document], version: str, partition: str) -> FAISS:
+        """Memory-map the persisted index, building and persisting it first if needed"""
+        root = os.path.join(self.index_dir, self._store_key(version))
+        loaded = load_index(root, partition)
+        if loaded is None:
+            store = self._build_vector_store(documents)
+            persist_index(root, partition, store.index, documents)
+            loaded = load_index(root, partition)
+
+        index, docstore, index_to_docstore_id = loaded
+        set_search_params(index, nprobe=self.index_config.nprobe, ef_search=self.index_config.ef_search)
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
+        )
+
+    def _build_vector_store(self, documents: List[Document]) -> FAISS:
+        """Embed documents and index them with the configured FAISS layout"""
+        vectors = self.batch_embedder.embed([doc.page_content for doc in documents])
+        index = build_index(vectors, self.index_config)
+        ids = [str(i) for i in range(len(documents))]
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(dict(zip(ids, documents))),
+            index_to_docstore_id=dict(enumerate(ids))
+        )
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Trade recall for latency on the live index (IVF nprobe / HNSW efSearch)"""
+        for vector_store in self.vector_stores.values():
+            set_search_params(vector_store.index, nprobe=nprobe, ef_search=ef_search)
+        self._result_cache.clear()
+
+    def _build_lexical_index(self, documents: List[Document]) -> Optional[LexicalIndex]:
+        """Build the FTS5 index over KB chunks and product rows"""
+        index = LexicalIndex()
+        index.add_documents(documents)
+        if self.cob_db_path and os.path.exists(self.cob_db_path):
+            index.add_products(self.cob_db_path)
+        return index if len(index) else None
 
     def _create_sample_knowledge(self):
         """Create sample knowledge base files"""
@@ -83,9 +248,161 @@ class KnowledgeBaseManager:
             with open(os.path.join(self.path, filename), "w") as f:
                 f.write(content)
 
-    def query(self, question: str, k: int = 4) -> List[Document]:
-        """Retrieve relevant documents for a query"""
-        if not self.vector_store:
+    def embed_query(self, question: str) -> List[float]:
+        """Embed a query, reusing cached embeddings for repeated questions"""
+        key = normalize_question(question)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(question)
+            self._embedding_cache.set(key, embedding)
+        return embedding
+
+    def guess_source(self, question: str) -> Optional[str]:
+        """The partition a question is about ("policy" -> policies), or None for all
+
+        Narrowing needs exactly one partition named and no other term found
+        only outside it: "price of Analytics Pro and the warranty policy"
+        also needs products. Otherwise everything is searched and fusion
+        ranks the results.
+        """
+        terms = extract_terms(question)
+        named, partition_terms = [], set()
+        for partition in self.partitions:
+            forms = {partition, partition.rstrip("s")}
+            if partition.endswith("ies"):
+                forms.add(partition[:-3] + "y")
+            if forms & set(terms):
+                named.append(partition)
+                partition_terms |= forms
+        if len(named) != 1:
+            return None
+
+        source = named[0]
+        lexical_index = self.lexical_index
+        if lexical_index:
+            for term in terms:
+                if term in partition_terms:
+                    continue
+                if not lexical_index.search(term, 1, partitions=[source]) and lexical_index.search(term, 1):
+                    return None
+        return source
+
+    def _resolve_partitions(self, snapshot: KnowledgeSnapshot, source: Union[str, Sequence[str], None]) -> Tuple[str, ...]:
+        """Partitions to search; all of them when no source filter is given"""
+        if source is None:
+            return tuple(sorted(snapshot.vector_stores))
+        names = [source] if isinstance(source, str) else source
+        return tuple(sorted(name.lower() for name in names))
+
+    def query(self, question: str, k: int = 4, source: Union[str, Sequence[str], None] = None) -> List[Document]:
+        """Retrieve relevant documents for a query, optionally within source partitions"""
+        snapshot = self._snapshot
+        if not snapshot.vector_stores and not snapshot.lexical_index:
             print("No vector store available.")
             return []
-        return self.vector_store.similarity_search(question, k=k)
+
+        partitions = self._resolve_partitions(snapshot, source)
+        key = (normalize_question(question), k, snapshot.version, partitions)
+        docs = self._result_cache.get(key)
+        if docs is None:
+            docs = self._lexical_fast_path(snapshot, question, k, source and partitions)
+            if docs is None:
+                vector_docs = []
+                stores = [snapshot.vector_stores[p] for p in partitions if p in snapshot.vector_stores]
+                if stores:
+                    embedding = self.embed_query(question)
+                    scored = []
+                    for store in stores:
+                        scored.extend(store.similarity_search_with_score_by_vector(embedding, k=k))
+                    # L2 distances are comparable across partitions: lower is closer
+                    scored.sort(key=lambda pair: pair[1])
+                    vector_docs = [doc for doc, _ in scored[:k]]
+                docs = self._fuse(snapshot, question, vector_docs, k, source and partitions)
+            self._result_cache.set(key, docs)
+        return list(docs)
+
+    def _lexical_fast_path(self, snapshot: KnowledgeSnapshot, question: str, k: int,
+                           partitions: Optional[Sequence[str]] = None) -> Optional[List[Document]]:
+        """Lexical results when confident enough to skip embedding, else None"""
+        if not self.lexical_fast_path or not snapshot.lexical_index:
+            return None
+        return snapshot.lexical_index.confident_search(question, k, partitions=partitions) or None
+
+    def _fuse(self, snapshot: KnowledgeSnapshot, question: str, vector_docs: List[Document], k: int,
+              partitions: Optional[Sequence[str]] = None) -> List[Document]:
+        """Combine FAISS and BM25 rankings with reciprocal rank fusion"""
+        if not snapshot.lexical_index:
+            return vector_docs
+        lexical_docs = snapshot.lexical_index.search(question, k, partitions=partitions)
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], k)
+
+    def _embed_queries(self, questions: List[str]) -> List[List[float]]:
+        """Embed several queries in a single embedding request"""
+        if isinstance(self.embeddings, GoogleGenerativeAIEmbeddings):
+            return self.embeddings.embed_documents(questions, task_type="retrieval_query")
+        return self.embeddings.embed_documents(questions)
+
+    def query_many(self, questions: List[str], k: int = 4,
+                   source: Union[str, Sequence[str], None] = None) -> List[List[Document]]:
+        """Retrieve relevant documents for a batch of queries
+
+        Uncached questions are embedded in one request and searched with one
+        batched FAISS call per partition; results are returned in input order.
+        """
+        snapshot = self._snapshot
+        if not snapshot.vector_stores and not snapshot.lexical_index:
+            print("No vector store available.")
+            return [[] for _ in questions]
+
+        partitions = self._resolve_partitions(snapshot, source)
+        lexical_partitions = source and partitions
+        results: List[List[Document]] = [None] * len(questions)
+        pending: Dict[str, List[int]] = {}
+        for i, question in enumerate(questions):
+            normalized = normalize_question(question)
+            docs = self._result_cache.get((normalized, k, snapshot.version, partitions))
+            if docs is None and normalized not in pending:
+                docs = self._lexical_fast_path(snapshot, question, k, lexical_partitions)
+                if docs is not None:
+                    self._result_cache.set((normalized, k, snapshot.version, partitions), docs)
+            if docs is not None:
+                results[i] = list(docs)
+            else:
+                pending.setdefault(normalized, []).append(i)
+
+        if not pending:
+            return results
+
+        keys = list(pending)
+        stores = [snapshot.vector_stores[p] for p in partitions if p in snapshot.vector_stores]
+        scored: List[List[Tuple[float, Document]]] = [[] for _ in keys]
+        if stores:
+            # Reuse cached query embeddings, embed the rest in one batch
+            vectors = [self._embedding_cache.get(key) for key in keys]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            if missing:
+                embedded = self._embed_queries([questions[pending[keys[i]][0]] for i in missing])
+                for i, vector in zip(missing, embedded):
+                    vectors[i] = vector
+                    self._embedding_cache.set(keys[i], vector)
+
+            # One batched search over the query matrix per partition
+            matrix = np.asarray(vectors, dtype=np.float32)
+            for store in stores:
+                distances, indices = store.index.search(matrix, k)
+                for row, (row_distances, row_indices) in enumerate(zip(distances, indices)):
+                    for distance, idx in zip(row_distances, row_indices):
+                        if idx == -1:
+                            continue
+                        doc_id = store.index_to_docstore_id[idx]
+                        scored[row].append((float(distance), store.docstore.search(doc_id)))
+
+        for key, row_scored in zip(keys, scored):
+            row_scored.sort(key=lambda pair: pair[0])
+            docs = [doc for _, doc in row_scored[:k]]
+            docs = self._fuse(snapshot, questions[pending[key][0]], docs, k, lexical_partitions)
+            self._result_cache.set((key, k, snapshot.version, partitions), docs)
+            for i in pending[key]:
+                results[i] = list(docs)
+
+        return results
@@ -0,0 +1,124 @@
+import os
+import json
+import mmap
+import shutil
+import faiss
+import numpy as np
+from typing import Iterable, List, Mapping, Optional, Tuple
+from langchain.schema import Document
+from langchain_community.docstore.base import Docstore
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks"
+METADATA_FILE = "metadata"
+
+# Read-only memory mapping: vectors are paged in from the shared page cache
+# instead of copied onto each worker's heap. Index types accept different
+# flags, so these are tried in order before a plain in-memory read.
+MMAP_FLAGS = (
+    faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY,
+    faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+)
+
+
+def _write_records(path: str, records: Iterable[bytes]):
+    """Write records back to back in <path>.bin with their offsets in <path>.idx.npy"""
+    offsets = [0]
+    with open(f"{path}.bin", "wb") as f:
+        for record in records:
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    np.save(f"{path}.idx.npy", np.asarray(offsets, dtype=np.int64))
+
+
+class OffsetRecords:
+    """Random access to records written by _write_records, backed by mmap"""
+
+    def __init__(self, path: str):
+        self._offsets = np.load(f"{path}.idx.npy", mmap_mode="r")
+        with open(f"{path}.bin", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # mmap rejects empty files
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._data[int(self._offsets[i]):int(self._offsets[i + 1])]
+
+
+class MmapDocstore(Docstore):
+    """Read-only docstore over memory-mapped chunk texts and metadata"""
+
+    def __init__(self, directory: str):
+        self._chunks = OffsetRecords(os.path.join(directory, CHUNKS_FILE))
+        self._metadata = OffsetRecords(os.path.join(directory, METADATA_FILE))
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def search(self, search: str) -> Document:
+        i = int(search)
+        return Document(
+            page_content=self._chunks[i].decode("utf-8"),
+            metadata=json.loads(self._metadata[i])
+        )
+
+
+class PositionalIds(Mapping):
+    """index_to_docstore_id for stores whose docstore ids are the FAISS positions"""
+
+    def __init__(self, size: int):
+        self._size = size
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < self._size:
+            raise KeyError(i)
+        return str(i)
+
+    def __iter__(self):
+        return iter(range(self._size))
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def persist_index(root: str, key: str, index: faiss.Index, documents: List[Document]) -> str:
+    """Write an index and its chunks under root/key"""
+    directory = os.path.join(root, key)
+    staging = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    faiss.write_index(index, os.path.join(staging, INDEX_FILE))
+    _write_records(os.path.join(staging, CHUNKS_FILE), (doc.page_content.encode("utf-8") for doc in documents))
+    _write_records(os.path.join(staging, METADATA_FILE), (json.dumps(doc.metadata).encode("utf-8") for doc in documents))
+
+    # Another worker may have persisted the same key concurrently
+    try:
+        os.rename(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    return directory
+
+
+def load_index(root: str, key: str) -> Optional[Tuple[faiss.Index, MmapDocstore, PositionalIds]]:
+    """Memory-map a persisted index, or None if key has not been persisted"""
+    directory = os.path.join(root, key)
+    index_path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+
+    index = None
+    for flags in MMAP_FLAGS:
+        try:
+            index = faiss.read_index(index_path, flags)
+            break
+        except RuntimeError:
+            continue
+    if index is None:
+        index = faiss.read_index(index_path)
+
+    docstore = MmapDocstore(directory)
+    return index, docstore, PositionalIds(len(docstore))
@@ -0,0 +1,64 @@
+import os
+import threading
+from typing import Dict, Tuple
+from .manager import KnowledgeBaseManager
+
+
+class KnowledgeBaseWatcher(threading.Thread):
+    """Background thread that hot-reloads a KnowledgeBaseManager on file changes
+
+    The knowledge base directory is polled for *.txt additions, removals and
+    modifications. When a change has been stable for one poll interval the
+    new index is built on this thread and swapped into the manager, so chat
+    turns keep being served from the previous version until the swap.
+    """
+
+    def __init__(self, kb_manager: KnowledgeBaseManager, interval: float = 5.0):
+        super().__init__(name="kb-watcher", daemon=True)
+        self.kb_manager = kb_manager
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self.reload_count = 0
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Modification time and size of every knowledge file"""
+        signature = {}
+        for root, _, files in os.walk(self.kb_manager.path):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                signature[path] = (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def run(self):
+        current = self._scan()
+        pending = None
+        while not self._stop_event.wait(self.interval):
+            latest = self._scan()
+            if latest == current:
+                pending = None
+                continue
+
+            # Wait for one quiet interval so half-written edits are not indexed
+            if latest != pending:
+                pending = latest
+                continue
+
+            try:
+                old_version = self.kb_manager.version
+                new_version = self.kb_manager.reindex()
+                if new_version != old_version:
+                    self.reload_count += 1
+                    print(f"Knowledge base reloaded: {old_version} -> {new_version}")
+                current = latest
+            except Exception as e:
+                print(f"Knowledge base reload failed, keeping current index: {e}")
+            pending = None
+
+    def stop(self):
+        self._stop_event.set()
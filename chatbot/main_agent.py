@@ -7,7 +7,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from .database.manager import DatabaseManager
 from .knowledge_base.manager import KnowledgeBaseManager
-from typing import Dict, Tuple, Deque
+from typing import Dict, List, Optional, Tuple, Deque
 
 MAX_HISTORY = 5
 
@@ -31,14 +31,22 @@ class MainOrchestratorAgent:
 
         # Failure counts per session
         self.failure_counts = {}
-    def add_to_history(self, role: str, content: str):
+    def add_to_history(self, role: str, content: str, session_id: Optional[str] = None):
         """Add message to conversation history with timestamp"""
         self.conversation_history.append({
             "role": role,
             "content": content,
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "session_id": session_id
         })
 
+    def session_history(self, session_id: Optional[str]) -> List[Dict]:
+        """One session's messages in chronological order"""
+        return sorted(
+            (msg for msg in self.conversation_history if msg.get('session_id') == session_id),
+            key=lambda x: x['timestamp']
+        )
+
     def get_conversation_context(self) -> str:
         """Get properly ordered conversation context"""
         # Sort by timestamp to ensure chronological order
@@ -119,7 +127,7 @@ class MainOrchestratorAgent:
     def process_message(self, user_input: str, session_id: str, session_state: Dict) -> Tuple[str, bool]:
         """Process message with enhanced routing and context"""
         # Add user input to history
-        self.add_to_history("user", user_input)
+        self.add_to_history("user", user_input, session_id)
 
         # Classify intent with conversation context
         intent = self.classify_intent(user_input, session_id)
@@ -131,12 +139,12 @@ class MainOrchestratorAgent:
         # Handle escalation
         if intent == "ESCALATE":
             response = self.handle_escalation(session_id)
-            self.add_to_history("assistant", response)
+            self.add_to_history("assistant", response, session_id)
             return response, True
 
         # Route to appropriate agent and get response
         if intent == "KNOWLEDGE":
-            response = self.knowledge_agent.handle_query(user_input)
+            response = self.knowledge_agent.handle_query(user_input, session_id)
         elif intent == "MARKETING":
             response = self.marketing_agent.handle_request(user_input, session_id, session_state)
         elif intent == "CLINICAL":
@@ -145,7 +153,7 @@ class MainOrchestratorAgent:
             response = self.handle_general_conversation(user_input)
 
         # Add response to history
-        self.add_to_history("assistant", response)
+        self.add_to_history("assistant", response, session_id)
         return response, False
 
     def handle_escalation(self, session_id: str) -> str:
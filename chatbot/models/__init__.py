@@ -1 +1,2 @@
-from .appointments import AppointmentRequest, MarketingMeetingRequest
\ No newline at end of file
+from .appointments import AppointmentRequest, MarketingMeetingRequest
+from .slots import ClinicSlot, MarketingSlot
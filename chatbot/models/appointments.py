@@ -22,6 +22,7 @@ class MarketingMeetingRequest:
     date: Optional[str] = None
     time: Optional[str] = None
     product_interest: Optional[str] = None
+    marketer_name: Optional[str] = None
     marketer_id: Optional[str] = None
     start_time: Optional[str] = None
     end_time: Optional[str] = None
\ No newline at end of file
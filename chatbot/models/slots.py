@@ -0,0 +1,47 @@
+from typing import NamedTuple
+
+
+def describe_time_range(start_time: str = None, end_time: str = None) -> str:
+    """Human-readable suffix for an optional time window"""
+    if start_time and end_time:
+        return f" between {start_time} and {end_time}"
+    if start_time:
+        return f" after {start_time}"
+    if end_time:
+        return f" before {end_time}"
+    return ""
+
+
+class ClinicSlot(NamedTuple):
+    """Open clinic appointment slot, in get_available_clinic_slots column order"""
+    clinic: str
+    doctor: str
+    specialty: str
+    datetime: str
+    clinic_id: str
+    doctor_id: str
+
+    @property
+    def date(self) -> str:
+        return self.datetime[:10]
+
+    @property
+    def time(self) -> str:
+        """HH:MM:SS part of the slot datetime"""
+        return self.datetime[11:19]
+
+
+class MarketingSlot(NamedTuple):
+    """Open marketing meeting slot, in get_available_marketing_slots column order"""
+    marketer: str
+    datetime: str
+    marketer_id: str
+
+    @property
+    def date(self) -> str:
+        return self.datetime[:10]
+
+    @property
+    def time(self) -> str:
+        """HH:MM:SS part of the slot datetime"""
+        return self.datetime[11:19]
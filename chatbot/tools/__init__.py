@@ -1,3 +1,3 @@
-from .clinic_tools import ClinicAvailabilityTool, AppointmentBookingTool, ClinicInfoTool, DoctorAvailabilityTool
+from .clinic_tools import ClinicAvailabilityTool, AppointmentBookingTool, BulkAppointmentBookingTool, ClinicInfoTool, DoctorAvailabilityTool
 from .knowledge_tools import KnowledgeRetrievalTool
-from .marketing_tools import MarketingAvailabilityTool, MarketingMeetingBookingTool
\ No newline at end of file
+from .marketing_tools import MarketingAvailabilityTool, MarketingMeetingBookingTool, BulkMarketingMeetingBookingTool
\ No newline at end of file
@@ -4,7 +4,8 @@ import json
 from datetime import datetime
 from uuid import uuid4
 from ..database.manager import DatabaseManager
-from typing import Optional
+from typing import List, Optional, Tuple
+from ..models.slots import ClinicSlot, describe_time_range
 
 # Tools for Database Operations
 class ClinicAvailabilityTool(BaseTool):
@@ -12,6 +13,14 @@ class ClinicAvailabilityTool(BaseTool):
     description: str = "Check available appointment slots for clinical appointments by date, specialty, or doctor"
     db_manager: DatabaseManager = Field(...)
 
+    def get_slots(self, date: str, specialty: str = None, doctor_name: str = None,
+                  start_time: str = None, end_time: str = None, session_id: str = None) -> List[ClinicSlot]:
+        """Structured availability for agents; _run renders it for the LLM"""
+        results = self.db_manager.get_available_clinic_slots(
+            date, specialty, doctor_name, start_time, end_time, session_id
+        )
+        return [ClinicSlot._make(row) for row in results]
+
     def _run(self, date: str = None, specialty: str = None,
              doctor_name: str = None, start_time: str = None,
              end_time: str = None) -> str:
@@ -20,35 +29,11 @@ class ClinicAvailabilityTool(BaseTool):
                 return "Please specify a date to check availability."
 
             # Get slots with time range filtering
-            results = self.db_manager.get_available_clinic_slots(
-                date, specialty, doctor_name, start_time, end_time
-            )
-            if not results:
-                time_range = ""
-                if start_time and end_time:
-                    time_range = f" between {start_time} and {end_time}"
-                elif start_time:
-                    time_range = f" after {start_time}"
-                elif end_time:
-                    time_range = f" before {end_time}"
-
-                return f"No available marketing meeting slots found on {date}{time_range}."
+            slots = self.get_slots(date, specialty, doctor_name, start_time, end_time)
+            if not slots:
+                return f"No available appointment slots found on {date}{describe_time_range(start_time, end_time)}."
 
-
-            # Format results
-            formatted_results = []
-            for row in results:
-                clinic_name, doctor_name, specialty, slot_datetime, clinic_id, doctor_id = row
-                formatted_results.append({
-                    "clinic": clinic_name,
-                    "doctor": doctor_name,
-                    "specialty": specialty,
-                    "datetime": slot_datetime,
-                    "clinic_id": clinic_id,
-                    "doctor_id": doctor_id
-                })
-
-            return json.dumps(formatted_results, indent=2)
+            return json.dumps([slot._asdict() for slot in slots])
 
         except Exception as e:
             return f"Error checking availability: {str(e)}"
@@ -59,10 +44,22 @@ class AppointmentBookingTool(BaseTool):
     db_manager: DatabaseManager = Field(...)
 
     def _run(self, clinic_id: str, doctor_name: str, slot_datetime: str,
-             patient_name: str, contact_email: str) -> str:
+             patient_name: str, contact_email: str, hold_id: Optional[str] = None,
+             idempotency_key: Optional[str] = None, doctor_id: Optional[str] = None) -> str:
         try:
-            conn = self.db_manager.get_clinic_connection()
-            cursor = conn.cursor()
+            assignments = {
+                "appointment_id": str(uuid4()),
+                "patient_name": patient_name,
+                "contact_email": contact_email
+            }
+
+            # Slot reserved at confirmation time: book it in one transaction
+            if hold_id:
+                result = self.db_manager.booking_service.commit_hold("clinic", hold_id, assignments)
+                if not result.booked:
+                    return "Failed to book appointment - your reservation expired or the slot is no longer available."
+                return f"Successfully booked appointment with ID: {result.appointment_id}"
+
             # Clean slot_datetime: remove any duplicate time info
             try:
                 # Try to parse and normalize to "YYYY-MM-DD HH:MM:SS"
@@ -73,54 +70,91 @@ class AppointmentBookingTool(BaseTool):
                 if len(parts) >= 2:
                     slot_datetime = f"{parts[0]} {parts[-1]}"  # Use first date + last time
 
-            # Generate appointment ID
-            appointment_id = str(uuid4())
-
-            # Update the appointment slot
-            cursor.execute("""
-                UPDATE appointments
-                SET available = 'False', appointment_id = ?, patient_name = ?, contact_email = ?
-                WHERE doctor_name = ? AND slot_datetime = ? AND available = 'True'
-            """, (appointment_id, patient_name, contact_email, doctor_name, slot_datetime))
-            if cursor.rowcount == 0:
-                conn.close()
+            # Update the appointment slot, by its (doctor_id, slot_datetime) key when known
+            if doctor_id:
+                match = {"doctor_id": doctor_id, "slot_datetime": slot_datetime}
+            else:
+                match = {"doctor_name": doctor_name, "slot_datetime": slot_datetime}
+            result = self.db_manager.booking_service.book_slot(
+                "clinic",
+                match,
+                assignments,
+                idempotency_key=idempotency_key
+            )
+            if not result.booked:
                 return "Failed to book appointment - slot may no longer be available."
 
-            conn.commit()
-            conn.close()
-
-            return f"Successfully booked appointment with ID: {appointment_id}"
+            return f"Successfully booked appointment with ID: {result.appointment_id}"
 
         except Exception as e:
             return f"Error booking appointment: {str(e)}"
 
+class BulkAppointmentBookingTool(BaseTool):
+    name: str = "bulk_appointment_booker"
+    description: str = "Book a series of clinical appointments (e.g. weekly follow-ups) for one patient in a single step"
+    db_manager: DatabaseManager = Field(...)
+
+    def _run(self, slots: List[Tuple[str, str]], patient_name: str, contact_email: str,
+             all_or_nothing: bool = True, idempotency_key: Optional[str] = None) -> str:
+        """slots are (doctor_id, slot_datetime) pairs"""
+        try:
+            if not slots:
+                return "Please specify the appointment slots to book."
+
+            assignments = [
+                {"appointment_id": str(uuid4()), "patient_name": patient_name, "contact_email": contact_email}
+                for _ in slots
+            ]
+            results = self.db_manager.booking_service.book_many(
+                "clinic", slots, assignments,
+                all_or_nothing=all_or_nothing,
+                idempotency_key=idempotency_key
+            )
+
+            lines = []
+            for (doctor_id, slot_datetime), result in zip(slots, results):
+                if result.booked:
+                    lines.append(f"- {slot_datetime}: booked, appointment ID {result.appointment_id}")
+                else:
+                    lines.append(f"- {slot_datetime}: not booked ({result.reason})")
+            booked = sum(result.booked for result in results)
+            return f"Booked {booked} of {len(slots)} appointments:\n" + "\n".join(lines)
+
+        except Exception as e:
+            return f"Error booking appointments: {str(e)}"
+
 # New Tools for Clinic Information
 class ClinicInfoTool(BaseTool):
     name: str = "clinic_info_fetcher"
     description: str = "Retrieve information about clinics, doctors, and specialties"
     db_manager: DatabaseManager = Field(...)
 
+    def _render(self) -> str:
+        # Get all clinic details
+        details = self.db_manager.get_clinic_details()
+        if not details:
+            return "No clinic information available."
+
+        # Organize by clinic
+        clinic_map = {}
+        for clinic, doctor, specialty in details:
+            if clinic not in clinic_map:
+                clinic_map[clinic] = []
+            clinic_map[clinic].append((doctor, specialty))
+
+        # Format response
+        response = []
+        for clinic, doctors in clinic_map.items():
+            doctor_list = "\n    ".join([f"- {doc} ({spec})" for doc, spec in doctors])
+            response.append(f"{clinic}:\n    {doctor_list}")
+        return "Here are our clinics with doctors and their specialties:\n" + "\n\n".join(response)
+
     def _run(self, query: str = None) -> str:
         try:
-            # Get all clinic details
-            details = self.db_manager.get_clinic_details()
-            if not details:
-                return "No clinic information available."
-            
-            # Organize by clinic
-            clinic_map = {}
-            for clinic, doctor, specialty in details:
-                if clinic not in clinic_map:
-                    clinic_map[clinic] = []
-                clinic_map[clinic].append((doctor, specialty))
-            
-            # Format response
-            response = []
-            for clinic, doctors in clinic_map.items():
-                doctor_list = "\n    ".join([f"- {doc} ({spec})" for doc, spec in doctors])
-                response.append(f"{clinic}:\n    {doctor_list}")
-            return "Here are our clinics with doctors and their specialties:\n" + "\n\n".join(response)
-            
+            # The rendered text only changes with the directory, so it is cached alongside it
+            return self.db_manager.directory_cache.get(
+                self.db_manager.clinic_db_path, "clinic_info_text", self._render
+            )
         except Exception as e:
             return f"Error retrieving clinic info: {str(e)}"
         
@@ -1,4 +1,5 @@
 import json
+from typing import Optional
 from langchain.tools import BaseTool
 from pydantic import Field
 from ..knowledge_base.manager import KnowledgeBaseManager
@@ -8,10 +9,12 @@ class KnowledgeRetrievalTool(BaseTool):
     description: str = "Retrieve information from COB Company's knowledge base"
     kb_manager: KnowledgeBaseManager = Field(...)
 
-    def _run(self, query: str) -> str:
+    def _run(self, query: str, source: Optional[str] = None) -> str:
         try:
-            # Retrieve relevant documents
-            docs = self.kb_manager.query(query)
+            # Retrieve relevant documents, within one source partition if given
+            docs = self.kb_manager.query(query, source=source)
+            if not docs and source:
+                docs = self.kb_manager.query(query)
             if not docs:
                 return "No relevant information found in the knowledge base."
 
@@ -3,13 +3,31 @@ from pydantic import Field
 import json
 from uuid import uuid4
 from ..database.manager import DatabaseManager
-from typing import Optional
+from typing import List, Optional, Tuple
+from ..models.slots import MarketingSlot, describe_time_range
+
+def customer_writer(customer_id: str, name: str, email: str):
+    """on_booked callback creating the customer inside the booking transaction"""
+    def write(conn):
+        conn.execute("""
+            INSERT OR IGNORE INTO customers (customer_id, name, email)
+            VALUES (?, ?, ?)
+        """, (customer_id, name, email))
+    return write
 
 class MarketingAvailabilityTool(BaseTool):
     name: str = "marketing_availability_checker"  # Fixed name
     description: str = "Check available marketing meeting slots by date or marketer name"  # Fixed description
     db_manager: DatabaseManager = Field(...)
 
+    def get_slots(self, date: str, marketer_name: str = None, start_time: str = None,
+                  end_time: str = None, session_id: str = None) -> List[MarketingSlot]:
+        """Structured availability for agents; _run renders it for the LLM"""
+        results = self.db_manager.get_available_marketing_slots(
+            date, marketer_name, start_time, end_time, session_id
+        )
+        return [MarketingSlot._make(row) for row in results]
+
     def _run(self, date: str = None, marketer_name: str = None,
              start_time: str = None, end_time: str = None) -> str:
         try:
@@ -17,30 +35,11 @@ class MarketingAvailabilityTool(BaseTool):
                 return "Please specify a date to check availability."
 
             # Get slots with time range filtering
-            results = self.db_manager.get_available_marketing_slots(
-                date, marketer_name, start_time, end_time
-            )
-            if not results:
-                time_range = ""
-                if start_time and end_time:
-                    time_range = f" between {start_time} and {end_time}"
-                elif start_time:
-                    time_range = f" after {start_time}"
-                elif end_time:
-                    time_range = f" before {end_time}"
-
-                return f"No available marketing meeting slots found on {date}{time_range}."
-
-            formatted_results = []
-            for row in results:
-                marketer_name, slot_datetime, marketer_id = row
-                formatted_results.append({
-                    "marketer": marketer_name,
-                    "datetime": slot_datetime,
-                    "marketer_id": marketer_id
-                })
-
-            return json.dumps(formatted_results, indent=2)
+            slots = self.get_slots(date, marketer_name, start_time, end_time)
+            if not slots:
+                return f"No available marketing meeting slots found on {date}{describe_time_range(start_time, end_time)}."
+
+            return json.dumps([slot._asdict() for slot in slots])
 
         except Exception as e:
             return f"Error checking marketing availability: {str(e)}"
@@ -51,35 +50,67 @@ class MarketingMeetingBookingTool(BaseTool):
     description: str = "Book a marketing meeting with specified details"
     db_manager: DatabaseManager = Field(...)
 
-    def _run(self, marketer_id: str, slot_datetime: str, customer_name: str, contact_email: str) -> str:
+    def _run(self, marketer_id: str, slot_datetime: str, customer_name: str, contact_email: str,
+             hold_id: Optional[str] = None, idempotency_key: Optional[str] = None) -> str:
         try:
-            conn = self.db_manager.get_cob_connection()
-            cursor = conn.cursor()
-
             # Generate appointment ID
-            appointment_id = str(uuid4())
             customer_id = str(uuid4())
+            assignments = {"appointment_id": str(uuid4()), "customer_id": customer_id}
+            add_customer = customer_writer(customer_id, customer_name, contact_email)
 
-            # Update the marketing availability slot
-            cursor.execute("""
-                UPDATE marketing_availability
-                SET available = 'False', appointment_id = ?, customer_id = ?
-                WHERE marketer_id = ? AND slot_datetime = ? AND available = 'True'
-            """, (appointment_id, customer_id, marketer_id, slot_datetime))
-            if cursor.rowcount == 0:
-                conn.close()
+            # Update the marketing availability slot (held slot if reserved at confirmation)
+            booking_service = self.db_manager.booking_service
+            if hold_id:
+                result = booking_service.commit_hold("marketing", hold_id, assignments, on_booked=add_customer)
+            else:
+                result = booking_service.book_slot(
+                    "marketing",
+                    {"marketer_id": marketer_id, "slot_datetime": slot_datetime},
+                    assignments,
+                    idempotency_key=idempotency_key,
+                    on_booked=add_customer
+                )
+            if not result.booked:
+                if hold_id:
+                    return "Failed to book marketing meeting - your reservation expired or the slot is no longer available."
                 return "Failed to book marketing meeting - slot may no longer be available."
 
-            # Create customer record
-            cursor.execute("""
-                INSERT OR IGNORE INTO customers (customer_id, name, email)
-                VALUES (?, ?, ?)
-            """, (customer_id, customer_name, contact_email))
+            return f"Successfully booked marketing meeting with ID: {result.appointment_id}"
+
+        except Exception as e:
+            return f"Error booking marketing meeting: {str(e)}"
+
+
+class BulkMarketingMeetingBookingTool(BaseTool):
+    name: str = "bulk_marketing_meeting_booker"
+    description: str = "Book several marketing meetings (e.g. a demo and its follow-up) for one customer in a single step"
+    db_manager: DatabaseManager = Field(...)
+
+    def _run(self, slots: List[Tuple[str, str]], customer_name: str, contact_email: str,
+             all_or_nothing: bool = True, idempotency_key: Optional[str] = None) -> str:
+        """slots are (marketer_id, slot_datetime) pairs"""
+        try:
+            if not slots:
+                return "Please specify the meeting slots to book."
 
-            conn.commit()
-            conn.close()
+            customer_id = str(uuid4())
+            assignments = [{"appointment_id": str(uuid4()), "customer_id": customer_id} for _ in slots]
+            # One customer record for the whole series, written with the bookings
+            results = self.db_manager.booking_service.book_many(
+                "marketing", slots, assignments,
+                all_or_nothing=all_or_nothing,
+                idempotency_key=idempotency_key,
+                on_booked=customer_writer(customer_id, customer_name, contact_email)
+            )
 
-            return f"Successfully booked marketing meeting with ID: {appointment_id}"
+            lines = []
+            for (marketer_id, slot_datetime), result in zip(slots, results):
+                if result.booked:
+                    lines.append(f"- {slot_datetime}: booked, meeting ID {result.appointment_id}")
+                else:
+                    lines.append(f"- {slot_datetime}: not booked ({result.reason})")
+            booked = sum(result.booked for result in results)
+            return f"Booked {booked} of {len(slots)} marketing meetings:\n" + "\n".join(lines)
 
         except Exception as e:
-            return f"Error booking marketing meeting: {str(e)}"
+            return f"Error booking marketing meetings: {str(e)}"
@@ -0,0 +1,35 @@
+import os
+import sys
+import argparse
+from datetime import date
+from dotenv import load_dotenv
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from chatbot.database.manager import DatabaseManager
+from chatbot.database.archive import SlotArchiver
+
+# Load environment variables
+load_dotenv()
+
+def archive_slots(before: date = None, batch_size: int = 10_000):
+    """Move past slots out of the hot tables (safe to run daily)"""
+    db_manager = DatabaseManager(
+        os.getenv("CLINIC_DB_PATH", "clinic_appointments_2.db"),
+        os.getenv("COB_DB_PATH", "cob_system_2.db")
+    )
+    archiver = SlotArchiver(db_manager, batch_size)
+    for kind, tables in archiver.archive_all(before).items():
+        for table, counts in tables.items():
+            print(f"{kind}/{table}: {counts['moved']:,} booked slots archived, "
+                  f"{counts['purged']:,} open slots removed")
+        # Every archived row was logged as a delete; drop what all pollers have read
+        print(f"{kind}/changes: {db_manager.prune_changes(kind):,} consumed log entries pruned")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Archive past slots to <db>_archive.db")
+    parser.add_argument("--before", type=date.fromisoformat, default=None, help="YYYY-MM-DD, defaults to today")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    archive_slots(args.before, args.batch_size)
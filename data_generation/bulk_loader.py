@@ -0,0 +1,66 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, List
+import pandas as pd
+
+# Durability is pointless while building a throwaway dataset; a crash means re-running the generator
+LOAD_PRAGMAS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144"  # 256 MiB page cache
+)
+
+
+def insert_chunks(conn: sqlite3.Connection, table: str, chunks: Iterable[pd.DataFrame],
+                  commit_rows: int = 1_000_000) -> int:
+    """Stream DataFrame chunks into table with executemany, committing every commit_rows rows"""
+    total = pending = 0
+    conn.execute("BEGIN")
+    for chunk in chunks:
+        columns = ", ".join(chunk.columns)
+        placeholders = ", ".join("?" for _ in chunk.columns)
+        conn.executemany(
+            f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+            chunk.itertuples(index=False, name=None)
+        )
+        total += len(chunk)
+        pending += len(chunk)
+        if pending >= commit_rows:
+            conn.execute("COMMIT")
+            conn.execute("BEGIN")
+            pending = 0
+    conn.execute("COMMIT")
+    return total
+
+
+def bulk_load(db_path: str, schema: List[str], tables: Dict[str, Iterable[pd.DataFrame]],
+              indexes: List[str] = (), commit_rows: int = 1_000_000) -> Dict[str, int]:
+    """Replace tables in db_path with streamed chunks, keeping the declared schema
+
+    Each table in tables is dropped and recreated from schema (so PRIMARY
+    KEYs survive, unlike DataFrame.to_sql), loaded chunk by chunk, and the
+    secondary indexes are built once at the end. Returns rows per table.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        for table in tables:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        for ddl in schema:
+            conn.execute(ddl)
+
+        counts = {}
+        for table, chunks in tables.items():
+            started = time.perf_counter()
+            counts[table] = insert_chunks(conn, table, chunks, commit_rows)
+            elapsed = time.perf_counter() - started
+            print(f"  {table}: {counts[table]:,} rows in {elapsed:.1f}s "
+                  f"({counts[table] / max(elapsed, 1e-9):,.0f} rows/s)")
+
+        for ddl in indexes:
+            conn.execute(ddl)
+        return counts
+    finally:
+        conn.close()
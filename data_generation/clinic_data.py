@@ -1,40 +1,62 @@
-from datetime import datetime, timedelta
-from uuid import uuid4
+from datetime import datetime
+from typing import Iterator, Optional
+import numpy as np
 from faker import Faker
 import pandas as pd
+from vectorized import uuid4_strings, faker_pool, slot_grid, resource_blocks, with_nulls, Pool
 
 fake = Faker()
 
-def gen_clinic_schedule(num_clinics: int, doctors_per_clinic: int, days: int, 
-                        start_hour: int, end_hour: int) -> pd.DataFrame:
-    data = []
+SPECIALTIES = ['Cardiology', 'Dermatology', 'Pediatrics', 'Orthopedics',
+               'Neurology', 'Oncology', 'General Practice', 'ENT', 'Ophthalmology']
+
+def iter_clinic_schedule(num_clinics: int, doctors_per_clinic: int, days: int,
+                         start_hour: int, end_hour: int, seed: Optional[int] = None,
+                         chunk_rows: int = 1_000_000, name_pool_size: int = 2000) -> Iterator[pd.DataFrame]:
+    """Clinic schedule as DataFrame chunks of about chunk_rows rows
+
+    Columns are built with NumPy per chunk of doctors; names and emails are
+    drawn from precomputed pools and repeated columns are categoricals, so
+    the cost per row is a few array ops.
+    """
+    rng = np.random.default_rng(seed)
+    if seed is not None:
+        fake.seed_instance(seed)
     start_date = datetime.today()
-    specialties = ['Cardiology', 'Dermatology', 'Pediatrics', 'Orthopedics', 
-                  'Neurology', 'Oncology', 'General Practice', 'ENT', 'Ophthalmology']
-    
-    clinics = [{'clinic_id': str(uuid4()), 'clinic_name': fake.company()} 
-              for _ in range(num_clinics)]
-    
-    for clinic in clinics:
-        for _ in range(doctors_per_clinic):
-            doctor_id = str(uuid4())
-            doctor_name = fake.name()
-            specialty = fake.random_element(specialties)
-            for day_offset in range(days):
-                date = start_date + timedelta(days=day_offset)
-                for hour in range(start_hour, end_hour):
-                    slot = datetime(year=date.year, month=date.month, day=date.day, hour=hour)
-                    booked = fake.boolean(chance_of_getting_true=30)
-                    data.append({
-                        'clinic_id': clinic['clinic_id'],
-                        'clinic_name': clinic['clinic_name'],
-                        'doctor_id': doctor_id,
-                        'doctor_name': doctor_name,
-                        'specialty': specialty,
-                        'slot_datetime': slot.strftime('%Y-%m-%d %H:%M:%S'),
-                        'available': str(not booked),
-                        'appointment_id': str(uuid4()) if booked else None,
-                        'patient_name': fake.name() if booked else None,
-                        'contact_email': fake.email() if booked else None
-                    })
-    return pd.DataFrame(data)
\ No newline at end of file
+
+    # IDs are generated in primary key order, so bulk loads append to the PK index
+    clinic_ids = Pool(np.sort(uuid4_strings(rng, num_clinics)))
+    clinic_names = Pool(faker_pool(fake, "company", num_clinics))
+    num_doctors = num_clinics * doctors_per_clinic
+    doctor_clinic = np.repeat(np.arange(num_clinics), doctors_per_clinic)
+    doctor_ids = Pool(np.sort(uuid4_strings(rng, num_doctors).reshape(num_clinics, doctors_per_clinic), axis=1).ravel())
+    names = faker_pool(fake, "name", name_pool_size)
+    emails = faker_pool(fake, "email", name_pool_size)
+    doctor_names = Pool(names[rng.integers(0, len(names), num_doctors)])
+    doctor_specialties = Pool(rng.choice(SPECIALTIES, num_doctors))
+
+    grid = Pool(slot_grid(start_date, days, start_hour, end_hour))
+    status = Pool(np.array(['True', 'False']))
+    slots_per_doctor = len(grid.codes)
+    for start, stop in resource_blocks(num_doctors, slots_per_doctor, chunk_rows):
+        doctors = np.repeat(np.arange(start, stop), slots_per_doctor)
+        clinics = doctor_clinic[doctors]
+        booked = rng.random(len(doctors)) < 0.3
+        num_booked = int(booked.sum())
+        yield pd.DataFrame({
+            'clinic_id': clinic_ids.take(clinics),
+            'clinic_name': clinic_names.take(clinics),
+            'doctor_id': doctor_ids.take(doctors),
+            'doctor_name': doctor_names.take(doctors),
+            'specialty': doctor_specialties.take(doctors),
+            'slot_datetime': grid.take(np.tile(np.arange(slots_per_doctor), stop - start)),
+            'available': status.take(booked.astype(np.int8)),
+            'appointment_id': with_nulls(uuid4_strings(rng, num_booked), booked),
+            'patient_name': with_nulls(names[rng.integers(0, len(names), num_booked)], booked),
+            'contact_email': with_nulls(emails[rng.integers(0, len(emails), num_booked)], booked)
+        })
+
+def gen_clinic_schedule(num_clinics: int, doctors_per_clinic: int, days: int, 
+                        start_hour: int, end_hour: int, seed: Optional[int] = None) -> pd.DataFrame:
+    chunks = list(iter_clinic_schedule(num_clinics, doctors_per_clinic, days, start_hour, end_hour, seed))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
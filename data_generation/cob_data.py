@@ -1,54 +1,72 @@
-from datetime import datetime, timedelta
-from uuid import uuid4
+from datetime import datetime
+from typing import Iterator, Optional
+import numpy as np
 from faker import Faker
 import pandas as pd
+from vectorized import uuid4_strings, faker_pool, slot_grid, resource_blocks, Pool
 
 fake = Faker()
 
-def gen_products_manual() -> pd.DataFrame:
+def gen_products_manual(rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    product_ids = uuid4_strings(rng or np.random.default_rng(), 5)
     return pd.DataFrame([
-        {'product_id': str(uuid4()), 'product_name': 'Analytics Pro', 
+        {'product_id': product_ids[0], 'product_name': 'Analytics Pro', 
          'description': 'Advanced analytics platform for data-driven insights.', 'category': 'Software'},
-        {'product_id': str(uuid4()), 'product_name': 'Security Guard', 
+        {'product_id': product_ids[1], 'product_name': 'Security Guard', 
          'description': 'Real-time threat detection and cybersecurity suite.', 'category': 'Cybersecurity'},
-        {'product_id': str(uuid4()), 'product_name': 'Health Tracker', 
+        {'product_id': product_ids[2], 'product_name': 'Health Tracker', 
          'description': 'Wearable device monitoring vital signs continuously.', 'category': 'Hardware'},
-        {'product_id': str(uuid4()), 'product_name': 'EduMaster', 
+        {'product_id': product_ids[3], 'product_name': 'EduMaster', 
          'description': 'E-learning platform with AI-driven tutoring.', 'category': 'Education'},
-        {'product_id': str(uuid4()), 'product_name': 'EcoPack', 
+        {'product_id': product_ids[4], 'product_name': 'EcoPack', 
          'description': 'Sustainable packaging solutions for businesses.', 'category': 'Sustainability'}
     ])
 
-def gen_marketing_schedule(team_size: int, days: int, start_hour: int, end_hour: int) -> pd.DataFrame:
-    data = []
+def iter_marketing_schedule(team_size: int, days: int, start_hour: int, end_hour: int,
+                            seed: Optional[int] = None, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Marketing availability as DataFrame chunks of about chunk_rows rows"""
+    rng = np.random.default_rng(seed)
+    if seed is not None:
+        fake.seed_instance(seed)
     start_date = datetime.today()
-    marketers = [{'marketer_id': str(uuid4()), 'marketer_name': fake.name()} 
-                for _ in range(team_size)]
-    
-    for m in marketers:
-        for day_offset in range(days):
-            date = start_date + timedelta(days=day_offset)
-            for hour in range(start_hour, end_hour):
-                slot = datetime(year=date.year, month=date.month, day=date.day, hour=hour, minute=0)
-                available = fake.boolean(chance_of_getting_true=70)
-                data.append({
-                    'marketer_id': m['marketer_id'],
-                    'marketer_name': m['marketer_name'],
-                    'slot_datetime': slot.strftime('%Y-%m-%d %H:%M:%S'),
-                    'available': str(available),
-                    'appointment_id': None,
-                    'customer_id': None
-                })
-    return pd.DataFrame(data)
 
-def gen_cob_customers(n: int, products_df: pd.DataFrame) -> pd.DataFrame:
+    # IDs are generated in primary key order, so bulk loads append to the PK index
+    marketer_ids = Pool(np.sort(uuid4_strings(rng, team_size)))
+    marketer_names = Pool(faker_pool(fake, "name", team_size))
+
+    grid = Pool(slot_grid(start_date, days, start_hour, end_hour))
+    status = Pool(np.array(['True', 'False']))
+    slots_per_marketer = len(grid.codes)
+    for start, stop in resource_blocks(team_size, slots_per_marketer, chunk_rows):
+        marketers = np.repeat(np.arange(start, stop), slots_per_marketer)
+        booked = rng.random(len(marketers)) >= 0.7
+        yield pd.DataFrame({
+            'marketer_id': marketer_ids.take(marketers),
+            'marketer_name': marketer_names.take(marketers),
+            'slot_datetime': grid.take(np.tile(np.arange(slots_per_marketer), stop - start)),
+            'available': status.take(booked.astype(np.int8)),
+            'appointment_id': np.full(len(marketers), None, dtype=object),
+            'customer_id': np.full(len(marketers), None, dtype=object)
+        })
+
+def gen_marketing_schedule(team_size: int, days: int, start_hour: int, end_hour: int,
+                           seed: Optional[int] = None) -> pd.DataFrame:
+    chunks = list(iter_marketing_schedule(team_size, days, start_hour, end_hour, seed))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+def gen_cob_customers(n: int, products_df: pd.DataFrame,
+                      rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """Customers drawn from rng; Faker is seeded from it too, so a seeded rng reproduces them"""
+    rng = rng or np.random.default_rng()
+    fake.seed_instance(int(rng.integers(2 ** 63)))
+    customer_ids = uuid4_strings(rng, n)
+    product_ids = products_df['product_id'].to_numpy()[rng.integers(0, len(products_df), n)]
     data = []
-    for _ in range(n):
-        product = products_df.sample(1).iloc[0]
+    for customer_id, product_id in zip(customer_ids, product_ids):
         data.append({
-            'customer_id': str(uuid4()), 'name': fake.name(), 'email': fake.email(),
+            'customer_id': customer_id, 'name': fake.name(), 'email': fake.email(),
             'phone': fake.phone_number(), 'signup_date': fake.date_between(start_date='-2y', end_date='today').strftime('%Y-%m-%d'),
             'status': fake.random_element(['active', 'inactive', 'pending']), 
-            'product_id': product['product_id']
+            'product_id': product_id
         })
-    return pd.DataFrame(data)
\ No newline at end of file
+    return pd.DataFrame(data)
@@ -1,80 +1,137 @@
 import os
+import sys
+import argparse
 import sqlite3
-import pandas as pd
+import numpy as np
 from dotenv import load_dotenv
-from clinic_data import gen_clinic_schedule
-from cob_data import gen_products_manual, gen_marketing_schedule, gen_cob_customers
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from chatbot.database.changes import log_reset
+from chatbot.database.directory import CLINIC_DIRECTORY_SCHEMAS, COB_DIRECTORY_SCHEMAS
+from chatbot.database.manager import CUSTOMERS_SCHEMA, PRODUCTS_SCHEMA, DatabaseManager
+from chatbot.database.schedule import (
+    APPOINTMENTS_SCHEMA, MARKETING_AVAILABILITY_SCHEMA, WORKING_HOURS_SCHEMA, unique_slot_index
+)
+from clinic_data import iter_clinic_schedule
+from cob_data import gen_products_manual, iter_marketing_schedule, gen_cob_customers
+from bulk_loader import bulk_load
 
 # Load environment variables
 load_dotenv()
 
-def generate_databases():
-    # Generate data
-    products_df = gen_products_manual()
-    customers_df = gen_cob_customers(100, products_df)
-    marketing_df = gen_marketing_schedule(7, 30, 9, 17)
-    clinic_df = gen_clinic_schedule(5, 8, 14, 9, 17)
+# Table definitions are shared with the application so the two cannot drift
+CLINIC_SCHEMA = [APPOINTMENTS_SCHEMA]
+# The primary key is (clinic_id, doctor_id, slot_datetime); lookups and uniqueness need (doctor_id, slot_datetime)
+CLINIC_INDEXES = [unique_slot_index("appointments", "doctor_id")]
+COB_SCHEMA = [MARKETING_AVAILABILITY_SCHEMA, PRODUCTS_SCHEMA, CUSTOMERS_SCHEMA]
+# The (marketer_id, slot_datetime) primary key already covers lookups and uniqueness
+COB_INDEXES = []
+
+# Bookings, holds and schedule exceptions all refer to the slots being replaced
+SLOT_STATE_TABLES = ("slot_exceptions", "slot_holds", "booking_requests")
+
+def write_working_hours(db_path: str, table: str, id_column: str, start_hour: int, end_hour: int):
+    """Weekly templates matching the generated schedule, used by refresh_schedules.py"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(WORKING_HOURS_SCHEMA)
+        conn.execute("DELETE FROM working_hours")
+        conn.execute(f"""
+            INSERT INTO working_hours (resource_id, weekday, start_time, end_time, slot_minutes)
+            SELECT DISTINCT {id_column}, weekday, ?, ?, 60
+            FROM {table}, (SELECT 0 AS weekday UNION ALL SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3
+                           UNION ALL SELECT 4 UNION ALL SELECT 5 UNION ALL SELECT 6)
+        """, (f"{start_hour:02d}:00:00", f"{end_hour:02d}:00:00"))
 
+def clear_slot_state(db_path: str):
+    """Drop bookings, holds and exceptions left over from the previous schedule"""
+    with sqlite3.connect(db_path) as conn:
+        for table in SLOT_STATE_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+def write_directory(db_path: str, schema: list, inserts: dict):
+    """Rebuild directory tables (clinics, doctors, marketers) from the generated schedule"""
+    with sqlite3.connect(db_path) as conn:
+        for ddl in schema:
+            conn.execute(ddl)
+        for table, select in inserts.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"INSERT INTO {table} {select}")
+
+def generate_databases(num_clinics: int = 5, doctors_per_clinic: int = 8, clinic_days: int = 14,
+                       team_size: int = 7, marketing_days: int = 30, num_customers: int = 100,
+                       start_hour: int = 9, end_hour: int = 17, seed: int = None,
+                       chunk_rows: int = 1_000_000):
     # Get database paths from environment or use defaults
     clinic_db_path = os.getenv("CLINIC_DB_PATH", "clinic_appointments_2.db")
     cob_db_path = os.getenv("COB_DB_PATH", "cob_system_2.db")
 
-    # Insert clinic data
-    with sqlite3.connect(clinic_db_path) as conn:
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS appointments (
-            clinic_id TEXT,
-            doctor_id TEXT,
-            doctor_name TEXT,
-            specialty TEXT,
-            clinic_name TEXT,
-            slot_datetime DATETIME,
-            available BOOLEAN DEFAULT 1,
-            appointment_id TEXT,
-            patient_name TEXT,
-            contact_email TEXT,
-            PRIMARY KEY (clinic_id, doctor_id, slot_datetime)
+    # Schedules are streamed chunk by chunk, so peak memory does not grow with dataset size
+    print(f"Loading {clinic_db_path}")
+    bulk_load(clinic_db_path, CLINIC_SCHEMA, {
+        'appointments': iter_clinic_schedule(
+            num_clinics, doctors_per_clinic, clinic_days, start_hour, end_hour, seed, chunk_rows
         )
-        """)
-        clinic_df.to_sql('appointments', conn, if_exists='replace', index=False)
+    }, CLINIC_INDEXES, commit_rows=chunk_rows)
+    write_working_hours(clinic_db_path, 'appointments', 'doctor_id', start_hour, end_hour)
+    write_directory(clinic_db_path, CLINIC_DIRECTORY_SCHEMAS, {
+        'clinics': "SELECT DISTINCT clinic_id, clinic_name FROM appointments",
+        'doctors': "SELECT DISTINCT doctor_id, doctor_name, specialty, clinic_id FROM appointments"
+    })
 
-    # Insert COB data
+    # Product and customer IDs come from one stream, so they are reproducible and never collide
+    rng = np.random.default_rng(seed)
+    products_df = gen_products_manual(rng)
+    customers_df = gen_cob_customers(num_customers, products_df, rng)
+    print(f"Loading {cob_db_path}")
+    bulk_load(cob_db_path, COB_SCHEMA, {
+        'marketing_availability': iter_marketing_schedule(
+            team_size, marketing_days, start_hour, end_hour, seed, chunk_rows
+        ),
+        'products': [products_df],
+        'customers': [customers_df]
+    }, COB_INDEXES, commit_rows=chunk_rows)
+    write_working_hours(cob_db_path, 'marketing_availability', 'marketer_id', start_hour, end_hour)
+    write_directory(cob_db_path, COB_DIRECTORY_SCHEMAS, {
+        'marketers': "SELECT DISTINCT marketer_id, marketer_name FROM marketing_availability"
+    })
+
+    clear_slot_state(clinic_db_path)
+    clear_slot_state(cob_db_path)
+
+    # DROP TABLE took the slot tables' triggers and unique indexes with it; recreate them
+    DatabaseManager(clinic_db_path, cob_db_path)
+    # The reload itself logged nothing; make running workers drop their cached availability
+    with sqlite3.connect(clinic_db_path) as conn:
+        log_reset(conn, 'appointments')
     with sqlite3.connect(cob_db_path) as conn:
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS marketing_availability (
-            marketer_id TEXT,
-            marketer_name TEXT,
-            slot_datetime DATETIME,
-            available BOOLEAN DEFAULT 1,
-            appointment_id TEXT,
-            customer_id TEXT,
-            PRIMARY KEY (marketer_id, slot_datetime)
-        )
-        """)
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            product_id TEXT PRIMARY KEY,
-            product_name TEXT,
-            description TEXT,
-            category TEXT
-        )
-        """)
-        conn.execute("""
-        CREATE TABLE IF NOT EXISTS customers (
-            customer_id TEXT PRIMARY KEY,
-            name TEXT,
-            email TEXT,
-            phone TEXT,
-            signup_date TEXT,
-            status TEXT,
-            product_id TEXT
-        )
-        """)
-        marketing_df.to_sql('marketing_availability', conn, if_exists='replace', index=False)
-        products_df.to_sql('products', conn, if_exists='replace', index=False)
-        customers_df.to_sql('customers', conn, if_exists='replace', index=False)
+        log_reset(conn, 'marketing_availability')
 
     print("✅ SQLite databases created and populated successfully.")
 
 if __name__ == '__main__':
-    generate_databases()
+    parser = argparse.ArgumentParser(description="Generate the sample clinic and COB databases")
+    parser.add_argument("--clinics", type=int, default=5)
+    parser.add_argument("--doctors-per-clinic", type=int, default=8)
+    parser.add_argument("--clinic-days", type=int, default=14)
+    parser.add_argument("--marketers", type=int, default=7)
+    parser.add_argument("--marketing-days", type=int, default=30)
+    parser.add_argument("--customers", type=int, default=100)
+    parser.add_argument("--start-hour", type=int, default=9)
+    parser.add_argument("--end-hour", type=int, default=17)
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible datasets")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="Rows generated and committed per batch")
+    args = parser.parse_args()
+    generate_databases(
+        num_clinics=args.clinics,
+        doctors_per_clinic=args.doctors_per_clinic,
+        clinic_days=args.clinic_days,
+        team_size=args.marketers,
+        marketing_days=args.marketing_days,
+        num_customers=args.customers,
+        start_hour=args.start_hour,
+        end_hour=args.end_hour,
+        seed=args.seed,
+        chunk_rows=args.chunk_rows
+    )
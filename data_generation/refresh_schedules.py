@@ -0,0 +1,31 @@
+import os
+import sys
+import argparse
+from datetime import date
+from dotenv import load_dotenv
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from chatbot.database.manager import DatabaseManager
+from chatbot.database.schedule import ScheduleMaterializer
+
+# Load environment variables
+load_dotenv()
+
+def refresh_schedules(horizon_days: int, today: date = None):
+    """Append missing future slots to both databases (safe to run daily)"""
+    db_manager = DatabaseManager(
+        os.getenv("CLINIC_DB_PATH", "clinic_appointments_2.db"),
+        os.getenv("COB_DB_PATH", "cob_system_2.db")
+    )
+    added = ScheduleMaterializer(db_manager, horizon_days).materialize_all(today)
+    for kind, rows in added.items():
+        print(f"{kind}: {rows:,} new slots")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Materialize future slots from working-hour templates")
+    parser.add_argument("--horizon-days", type=int, default=30)
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="YYYY-MM-DD, defaults to today")
+    args = parser.parse_args()
+    refresh_schedules(args.horizon_days, args.today)
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+# Positions of the hex groups in the canonical 8-4-4-4-12 UUID layout
+UUID_GROUPS = ((0, 8), (8, 12), (12, 16), (16, 20), (20, 32))
+
+
+def uuid4_strings(rng: np.random.Generator, n: int) -> np.ndarray:
+    """n random version-4 UUID strings, built column-wise from one byte buffer"""
+    raw = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40   # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80   # RFC 4122 variant
+    hexed = np.frombuffer(raw.tobytes().hex().encode("ascii"), dtype=np.uint8).reshape(n, 32)
+
+    out = np.full((n, 36), ord("-"), dtype=np.uint8)
+    for dashes, (start, stop) in enumerate(UUID_GROUPS):
+        out[:, start + dashes:stop + dashes] = hexed[:, start:stop]
+    return out.view("S36").ravel().astype("U36")
+
+
+def faker_pool(fake: Faker, provider: str, size: int) -> np.ndarray:
+    """Precomputed pool of Faker values, sampled by index instead of per row"""
+    generate = getattr(fake, provider)
+    return np.array([generate() for _ in range(size)])
+
+
+def slot_grid(start_date: datetime, days: int, start_hour: int, end_hour: int) -> np.ndarray:
+    """Hourly slot_datetime strings for one resource, in schedule order"""
+    day = datetime(start_date.year, start_date.month, start_date.day)
+    return np.array([
+        (day + timedelta(days=offset, hours=hour)).strftime('%Y-%m-%d %H:%M:%S')
+        for offset in range(days)
+        for hour in range(start_hour, end_hour)
+    ])
+
+
+def resource_blocks(num_resources: int, slots_per_resource: int,
+                    chunk_rows: int) -> Iterator[Tuple[int, int]]:
+    """[start, stop) resource ranges whose slots fill about chunk_rows rows each"""
+    step = max(1, chunk_rows // max(1, slots_per_resource))
+    for start in range(0, num_resources, step):
+        yield start, min(num_resources, start + step)
+
+
+def with_nulls(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Object column holding values where mask is set and None elsewhere"""
+    column = np.full(len(mask), None, dtype=object)
+    column[mask] = values
+    return column
+
+
+class Pool:
+    """Distinct values plus codes for a per-resource attribute
+
+    take() returns a Categorical over the distinct values, so repeated
+    columns cost one small integer per row instead of one string object.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.categories, self.codes = np.unique(values, return_inverse=True)
+
+    def take(self, index: np.ndarray) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.codes[index], self.categories)